@@ -1,141 +1,1577 @@
+import csv
+import math
+import mmap
+import os
+import random
+import struct
+import tempfile
+import threading
+import time
 import unittest
-from typing import TypeVar, Generic, List, Tuple, Optional, Callable
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from heapq import heapify, heappush, heappop
+from itertools import count, islice
+from collections.abc import KeysView, ValuesView, ItemsView
+from typing import TypeVar, Generic, List, Tuple, Dict, Optional, Callable, Iterable, Iterator, Sized
 K = TypeVar('K')
 V = TypeVar('V')
 
+_MISSING = object()  # Default for lookups that must tell a missing key from a None value
+
+_MASK64 = 0xFFFFFFFFFFFFFFFF
+_INF = float("inf")
+
+
+def _edge_key(u, v) -> frozenset:
+    """ Key of the undirected edge u-v. Vertex IDs needn't be ordered, so the ends aren't sorted """
+    return frozenset((u, v))
+
+
+# Hash functions for the tables. Tables pick a bucket from the low bits of the hash, so the
+# identity hash makes structured keys (strided or sharded IDs, grid coordinates) collide;
+# the mixers below spread every input bit over the whole output first.
+
+def identity_hash(key) -> int:
+    """ Returns the key itself, for keys known to be well distributed """
+    return key
+
+
+def splitmix64(x: int) -> int:
+    """ splitmix64 finalizer, spreads every input bit over the whole 64-bit output """
+    x = (x + 0x9E3779B97F4A7C15) & _MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return x ^ (x >> 31)
+
+
+def splitmix64_hash(key) -> int:
+    """ Hashes any hashable key with the splitmix64 finalizer """
+    return splitmix64(hash(key))
+
+
+def fibonacci_hash(key) -> int:
+    """ Multiplies by 2^64 / golden ratio and folds the high half into the low bits. Cheaper than splitmix64 """
+    x = (hash(key) * 0x9E3779B97F4A7C15) & _MASK64
+    return x ^ (x >> 32)
+
+
+def seeded_hash(seed: Optional[int] = None) -> Callable[[object], int]:
+    """ Returns a splitmix64 hash keyed by the seed (random when not given), so collisions differ per instance """
+    if seed is None:
+        seed = random.getrandbits(64)
+    return lambda key: splitmix64(hash(key) ^ seed)
+
+
+class TableKeysView(KeysView):
+    """ Live view of the keys of a table, iterating its storage without copying """
+
+    def __iter__(self):
+        return self._mapping._iter_items(0)
+
+    def __repr__(self):
+        return 'TableKeysView(%r)' % list(self)
+
+
+class TableValuesView(ValuesView):
+    """ Live view of the values of a table """
+
+    def __iter__(self):
+        return self._mapping._iter_items(1)
+
+    def __repr__(self):
+        return 'TableValuesView(%r)' % list(self)
+
+
+class TableItemsView(ItemsView):
+    """ Live view of the (key, value) pairs of a table """
+
+    def __iter__(self):
+        return self._mapping._iter_items(None)
+
+    def __contains__(self, item):
+        key, value = item
+        v = self._mapping.get(key, _MISSING)
+        return v is not _MISSING and v == value
+
+    def __repr__(self):
+        return 'TableItemsView(%r)' % list(self)
+
+
+class TableStats:
+    """
+    Probe and resize counters of a table created with track_stats=True
+    """
+
+    def __init__(self):
+        self.probe_lengths: Dict[int, int] = {}  # histogram: entries (or slots) inspected per operation
+        self.resizes = 0
+        self.resize_seconds = 0.0
+
+    def record_probe(self, length: int):
+        self.probe_lengths[length] = self.probe_lengths.get(length, 0) + 1
+
+    def record_resize(self, seconds: float, finished=True):
+        """ Adds the time of a resize, or of one step of an incremental resize when finished is False """
+        self.resize_seconds += seconds
+        if finished:
+            self.resizes += 1
+
+    @staticmethod
+    def report(stats: Optional['TableStats'], size: int, capacity: int, chain_lengths: Iterable[int]) -> dict:
+        """ Builds the dict returned by the stats() method of the tables """
+        chains: Dict[int, int] = {}
+        for length in chain_lengths:
+            chains[length] = chains.get(length, 0) + 1
+        return {
+            'size': size,
+            'capacity': capacity,
+            'load_factor': size / capacity,
+            'max_chain': max(chains, default=0),
+            'chain_lengths': chains,
+            'probe_lengths': dict(stats.probe_lengths) if stats is not None else {},
+            'max_probe': max(stats.probe_lengths, default=0) if stats is not None else 0,
+            'resizes': stats.resizes if stats is not None else 0,
+            'resize_seconds': stats.resize_seconds if stats is not None else 0.0,
+        }
+
 
 class HashTable(Generic[K, V]):
     """
     A HashTable which maps keys of type K to values of type V
     """
 
-    def __init__(self, get_hash: Callable[[K], int], capacity=4):
-        self.elements: List[List[Tuple[K, V]]] = [[] for _ in range(capacity)]  # Sets initial capacity
+    # The number of buckets migrated by every operation while an incremental resize is running
+    rehash_step = 4
+
+    def __init__(self, get_hash: Callable[[K], int], capacity=4, incremental=False, shrink_threshold=0.125,
+                 track_stats=False):
+        # Every entry is (key, value, hash) so resizing never calls get_hash again
+        self.elements: List[List[Tuple[K, V, int]]] = [[] for _ in range(capacity)]  # Sets initial capacity
         self._size = 0  # The number of entries
         self.get_hash = get_hash  # hash function
-        
+        self.incremental = incremental  # resize progressively instead of in one pass
+        self.shrink_threshold = shrink_threshold  # halve the capacity when the load drops below this
+        self._min_capacity = capacity
+        self._old_elements: Optional[List[List[Tuple[K, V, int]]]] = None  # buckets still being migrated
+        self._rehash_index = 0  # buckets of _old_elements below this index are already migrated
+        self._stats: Optional[TableStats] = TableStats() if track_stats else None
+
+    def _bucket(self, h: int, create=False) -> List[Tuple[K, V, int]]:
+        """
+        Returns the bucket that holds (or would hold) a key with hash h.
+        Buckets of an incremental resize are created on first insert, so a missing one reads as empty
+        """
+        buckets = self.elements
+        old = self._old_elements
+        if old is not None and h % len(old) >= self._rehash_index:
+            buckets = old
+        index = h % len(buckets)
+        bucket = buckets[index]
+        if bucket is None:
+            if not create:
+                return []
+            bucket = buckets[index] = []
+        return bucket
+
+    def _rehash_step(self):
+        """ Migrates the next rehash_step buckets of an incremental resize """
+        start = time.perf_counter() if self._stats is not None else 0.0
+        old = self._old_elements
+        new_list = self.elements
+        new_capacity = len(new_list)
+        end = min(self._rehash_index + self.rehash_step, len(old))
+        for index in range(self._rehash_index, end):
+            for kv in old[index] or ():
+                i = kv[2] % new_capacity
+                if new_list[i] is None:
+                    new_list[i] = [kv]
+                else:
+                    new_list[i].append(kv)
+            old[index] = None
+        self._rehash_index = end
+        if end == len(old):
+            self._old_elements = None
+        if self._stats is not None:
+            self._stats.record_resize(time.perf_counter() - start, finished=False)
+
+    def _finish_rehash(self):
+        """ Completes a running incremental resize """
+        while self._old_elements is not None:
+            self._rehash_step()
+
+    def _resize(self, new_capacity: int):
+        """ Resizes the table, timing the resize when stats are tracked """
+        if self._stats is None:
+            self._rebuild(new_capacity)
+            return
+        start = time.perf_counter()
+        self._rebuild(new_capacity)
+        self._stats.record_resize(time.perf_counter() - start)
+
+    def _rebuild(self, new_capacity: int):
+        """ Moves every entry into a bucket array of the given capacity """
+        self._finish_rehash()
+        if self.incremental:
+            # A C-level fill: bucket lists appear as entries migrate, so no operation pays O(capacity) allocations
+            self._old_elements = self.elements
+            self._rehash_index = 0
+            self.elements = [None] * new_capacity
+            return
+        new_list: List[List[Tuple[K, V, int]]] = [[] for _ in range(new_capacity)]
+        for ele in self.elements:
+            for kv in ele:
+                new_list[kv[2] % new_capacity].append(kv)
+        self.elements = new_list
 
     def double_capacity(self):
         """ Doubles the capacity """
-        new_capacity = len(self.elements) * 2
-        new_size=0
-        new_list: List[List[Tuple[K, V]]] = [[] for _ in range(new_capacity)]
-  
-        for ele in self.elements:
-            if len(ele)==0:
+        self._resize(len(self.elements) * 2)
+
+    def reserve(self, n: int):
+        """ Grows the capacity so that n entries fit without further resizing """
+        capacity = len(self.elements)
+        while n > capacity / 2:
+            capacity *= 2
+        if capacity != len(self.elements):
+            self._resize(capacity)
+
+    def shrink_to_fit(self):
+        """ Shrinks the capacity to the smallest one that holds the current entries """
+        capacity = self._min_capacity
+        while self._size > capacity / 2:
+            capacity *= 2
+        if capacity < len(self.elements):
+            self._resize(capacity)
+
+    def __setitem__(self, key: K, value: V):
+        """ Maps the key to the value. If the key already exists, replaces its value with the new one """
+        self._put(key, value, self.get_hash(key))
+
+    def _put(self, key: K, value: V, h: int):
+        """ Upserts the key whose hash is already known """
+        if self._old_elements is not None:
+            self._rehash_step()
+        bucket = self._bucket(h, create=True)
+        for i, kv in enumerate(bucket):
+            if kv[0] == key:
+                bucket[i] = (key, value, h)
+                if self._stats is not None:
+                    self._stats.record_probe(i + 1)
+                return
+        if self._stats is not None:
+            self._stats.record_probe(len(bucket))
+        if self._size + 1 > len(self.elements) / 2:
+            self.double_capacity()
+            bucket = self._bucket(h, create=True)
+        bucket.append((key, value, h))
+        self._size += 1
+
+    def update_many(self, items: Iterable[Tuple[K, V]]):
+        """ Maps every (key, value) pair, growing the table at most once up front """
+        if not isinstance(items, Sized):
+            items = list(items)
+        self.reserve(self._size + len(items))
+        for key, value in items:
+            self.__setitem__(key, value)
+
+    @classmethod
+    def from_items(cls, get_hash: Callable[[K], int], items: Iterable[Tuple[K, V]]) -> 'HashTable[K, V]':
+        """ Builds a table holding the given (key, value) pairs """
+        table = cls(get_hash)
+        table.update_many(items)
+        return table
+
+    def delete(self, key: K):
+        """ Deletes the key from the HashTable. :raise: an exception when the key doesn't exist  """
+        if not self._remove(key, self.get_hash(key)):
+            raise Exception ("key doesn't exists")
+
+    def delete_many(self, keys: Iterable[K]) -> int:
+        """ Deletes every existing key, shrinking at most once at the end. :return: number of keys deleted """
+        removed = 0
+        for key in keys:
+            removed += self._remove(key, self.get_hash(key), shrink=False)
+        if self._size < len(self.elements) * self.shrink_threshold:
+            self.shrink_to_fit()
+        return removed
+
+    def _remove(self, key: K, h: int, shrink=True) -> bool:
+        """ Removes the key whose hash is already known. :return: whether the key existed """
+        if self._old_elements is not None:
+            self._rehash_step()
+        bucket = self._bucket(h)
+        if self._stats is not None:
+            self._stats.record_probe(len(bucket))
+        for i, kv in enumerate(bucket):
+            if kv[0] == key:
+                del bucket[i]
+                self._size -= 1
+                capacity = len(self.elements)
+                if shrink and self._size < capacity * self.shrink_threshold and capacity // 2 >= self._min_capacity:
+                    self._resize(capacity // 2)
+                return True
+        return False
+
+    # Allows one to use square brackets: hash_table[key].
+    # Check https://docs.python.org/3/reference/datamodel.html#object.__getitem__
+    def __getitem__(self, key: K) -> Optional[V]:
+        """ :return: value corresponding to the key. Returns None if the key doesn't exist """
+        return self.get(key)
+
+    def get(self, key: K, default=None):
+        """ :return: value corresponding to the key, or default if the key doesn't exist """
+        return self._get(key, self.get_hash(key), default)
+
+    def _get(self, key: K, h: int, default=None):
+        """ Looks up the key whose hash is already known. Reads never advance a resize, so iterating is safe """
+        bucket = self._bucket(h)
+        for kv in bucket:
+            if kv[0] == key:
+                if self._stats is not None:
+                    self._stats.record_probe(bucket.index(kv) + 1)
+                return kv[1]
+        if self._stats is not None:
+            self._stats.record_probe(len(bucket))
+        return default
+
+    def __contains__(self, key) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def _iter_items(self, field: Optional[int]) -> Iterator:
+        """ Yields field 0 (keys), 1 (values) or, for None, (key, value) pairs of every entry """
+        buckets = self.elements
+        if self._old_elements is not None:
+            buckets = self._old_elements[self._rehash_index:] + buckets
+        for ele in buckets:
+            for kv in ele or ():
+                yield kv[:2] if field is None else kv[field]
+
+    def __iter__(self) -> Iterator[K]:
+        return self._iter_items(0)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def keys(self) -> TableKeysView:
+        """ Returns a view of all existing keys """
+        return TableKeysView(self)
+
+    def values(self) -> TableValuesView:
+        """ Returns a view of all existing values """
+        return TableValuesView(self)
+
+    def items(self) -> TableItemsView:
+        """ Returns a view of all existing (key, value) pairs """
+        return TableItemsView(self)
+
+    def _chain_lengths(self) -> Iterator[int]:
+        """ Yields the length of every bucket """
+        buckets = self.elements
+        if self._old_elements is not None:
+            buckets = self._old_elements[self._rehash_index:] + buckets
+        for ele in buckets:
+            yield len(ele) if ele is not None else 0
+
+    def stats(self) -> dict:
+        """ Returns chain lengths, load factor and, with track_stats=True, probe and resize counters """
+        return TableStats.report(self._stats, self._size, len(self.elements), self._chain_lengths())
+
+    def save(self, path: str):
+        """ Saves int keys and int (or nested table) values in a file that open_mmap() can serve """
+        save_snapshot(self, path)
+
+    def size(self):
+        """ Returns the number of entries. Must take O(1) time """
+        return self._size
+
+
+# Markers for slots of OpenAddressingHashTable that were never used / were deleted
+_EMPTY = object()
+_DELETED = object()
+
+
+class OpenAddressingHashTable(Generic[K, V]):
+    """
+    A HashTable using linear probing. Keys, values and hashes live in flat parallel lists
+    instead of one list per bucket and one tuple per entry
+    """
+
+    def __init__(self, get_hash: Callable[[K], int], capacity=4, shrink_threshold=0.125, track_stats=False):
+        capacity = max(4, 1 << (capacity - 1).bit_length())  # Capacity is kept a power of two
+        self._keys: List[object] = [_EMPTY] * capacity
+        self._values: List[Optional[V]] = [None] * capacity
+        self._hashes: List[int] = [0] * capacity
+        self._size = 0  # The number of entries
+        self._used = 0  # The number of entries plus tombstones
+        self.get_hash = get_hash  # hash function
+        self.shrink_threshold = shrink_threshold  # halve the capacity when the load drops below this
+        self._min_capacity = capacity
+        self._stats: Optional[TableStats] = TableStats() if track_stats else None
+
+    def _slot(self, key: K, h: int) -> int:
+        """ Returns the slot holding the key, or -1 when the key doesn't exist """
+        keys = self._keys
+        mask = len(keys) - 1
+        i = h & mask
+        while True:
+            k = keys[i]
+            if k is _EMPTY:
+                break
+            if k is not _DELETED and self._hashes[i] == h and k == key:
+                if self._stats is not None:
+                    self._stats.record_probe(((i - h) & mask) + 1)
+                return i
+            i = (i + 1) & mask
+        if self._stats is not None:
+            self._stats.record_probe(((i - h) & mask) + 1)
+        return -1
+
+    def _resize(self, new_capacity: int):
+        """ Resizes the table, timing the resize when stats are tracked """
+        if self._stats is None:
+            self._rebuild(new_capacity)
+            return
+        start = time.perf_counter()
+        self._rebuild(new_capacity)
+        self._stats.record_resize(time.perf_counter() - start)
+
+    def _rebuild(self, new_capacity: int):
+        """ Rebuilds the table with the given capacity, dropping tombstones """
+        old_keys, old_values, old_hashes = self._keys, self._values, self._hashes
+        self._keys = [_EMPTY] * new_capacity
+        self._values = [None] * new_capacity
+        self._hashes = [0] * new_capacity
+        mask = new_capacity - 1
+        for i, k in enumerate(old_keys):
+            if k is _EMPTY or k is _DELETED:
                 continue
-            for kv in ele:
-                index=self.get_hash(kv[0]) % new_capacity
-                new_list[index].append((kv))
-                new_size+=1
-        
-        self.elements = new_list  
-        self._size=new_size
-        
-        ...
+            h = old_hashes[i]
+            j = h & mask
+            while self._keys[j] is not _EMPTY:
+                j = (j + 1) & mask
+            self._keys[j] = k
+            self._values[j] = old_values[i]
+            self._hashes[j] = h
+        self._used = self._size
+
+    def double_capacity(self):
+        """ Doubles the capacity """
+        self._resize(len(self._keys) * 2)
+
+    def reserve(self, n: int):
+        """ Grows the capacity so that n entries fit without further resizing """
+        capacity = len(self._keys)
+        while n > capacity // 2:
+            capacity *= 2
+        if capacity != len(self._keys):
+            self._resize(capacity)
+
+    def shrink_to_fit(self):
+        """ Shrinks the capacity to the smallest one that holds the current entries """
+        capacity = self._min_capacity
+        while self._size > capacity // 2:
+            capacity *= 2
+        if capacity < len(self._keys):
+            self._resize(capacity)
+
+    def __setitem__(self, key: K, value: V):
+        """ Maps the key to the value. If the key already exists, replaces its value with the new one """
+        self._put(key, value, self.get_hash(key))
+
+    def _put(self, key: K, value: V, h: int):
+        """ Upserts the key whose hash is already known """
+        keys = self._keys
+        mask = len(keys) - 1
+        i = h & mask
+        tombstone = -1
+        while True:
+            k = keys[i]
+            if k is _EMPTY:
+                break
+            if k is _DELETED:
+                if tombstone < 0:
+                    tombstone = i
+            elif self._hashes[i] == h and k == key:
+                self._values[i] = value
+                if self._stats is not None:
+                    self._stats.record_probe(((i - h) & mask) + 1)
+                return
+            i = (i + 1) & mask
+        if self._stats is not None:
+            self._stats.record_probe(((i - h) & mask) + 1)
+        if tombstone >= 0:
+            i = tombstone
+        else:
+            if self._used + 1 > len(keys) // 2:
+                # Only grow when live entries need the room, otherwise just sweep tombstones
+                self._resize(len(keys) * 2 if self._size + 1 > len(keys) // 4 else len(keys))
+                self._put(key, value, h)
+                return
+            self._used += 1
+        keys[i] = key
+        self._values[i] = value
+        self._hashes[i] = h
+        self._size += 1
+
+    def update_many(self, items: Iterable[Tuple[K, V]]):
+        """ Maps every (key, value) pair, growing the table at most once up front """
+        if not isinstance(items, Sized):
+            items = list(items)
+        self.reserve(self._size + len(items))
+        for key, value in items:
+            self.__setitem__(key, value)
+
+    @classmethod
+    def from_items(cls, get_hash: Callable[[K], int], items: Iterable[Tuple[K, V]]) -> 'OpenAddressingHashTable[K, V]':
+        """ Builds a table holding the given (key, value) pairs """
+        table = cls(get_hash)
+        table.update_many(items)
+        return table
+
+    def delete(self, key: K):
+        """ Deletes the key from the HashTable. :raise: an exception when the key doesn't exist  """
+        if not self._remove(key, self.get_hash(key)):
+            raise Exception ("key doesn't exists")
+
+    def delete_many(self, keys: Iterable[K]) -> int:
+        """ Deletes every existing key, shrinking at most once at the end. :return: number of keys deleted """
+        removed = 0
+        for key in keys:
+            removed += self._remove(key, self.get_hash(key), shrink=False)
+        if self._size < len(self._keys) * self.shrink_threshold:
+            self.shrink_to_fit()
+        return removed
+
+    def _remove(self, key: K, h: int, shrink=True) -> bool:
+        """ Removes the key whose hash is already known. :return: whether the key existed """
+        i = self._slot(key, h)
+        if i < 0:
+            return False
+        self._keys[i] = _DELETED
+        self._values[i] = None
+        self._size -= 1
+        capacity = len(self._keys)
+        if shrink and self._size < capacity * self.shrink_threshold and capacity // 2 >= self._min_capacity:
+            self._resize(capacity // 2)
+        return True
+
+    def __getitem__(self, key: K) -> Optional[V]:
+        """ :return: value corresponding to the key. Returns None if the key doesn't exist """
+        i = self._slot(key, self.get_hash(key))
+        return None if i < 0 else self._values[i]
+
+    def get(self, key: K, default=None):
+        """ :return: value corresponding to the key, or default if the key doesn't exist """
+        return self._get(key, self.get_hash(key), default)
+
+    def _get(self, key: K, h: int, default=None):
+        """ Looks up the key whose hash is already known """
+        i = self._slot(key, h)
+        return default if i < 0 else self._values[i]
+
+    def __contains__(self, key) -> bool:
+        return self._slot(key, self.get_hash(key)) >= 0
+
+    def _iter_items(self, field: Optional[int]) -> Iterator:
+        """ Yields field 0 (keys), 1 (values) or, for None, (key, value) pairs of every entry """
+        values = self._values
+        for i, k in enumerate(self._keys):
+            if k is _EMPTY or k is _DELETED:
+                continue
+            if field is None:
+                yield k, values[i]
+            else:
+                yield k if field == 0 else values[i]
+
+    def __iter__(self) -> Iterator[K]:
+        return self._iter_items(0)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def keys(self) -> TableKeysView:
+        """ Returns a view of all existing keys """
+        return TableKeysView(self)
+
+    def values(self) -> TableValuesView:
+        """ Returns a view of all existing values """
+        return TableValuesView(self)
+
+    def items(self) -> TableItemsView:
+        """ Returns a view of all existing (key, value) pairs """
+        return TableItemsView(self)
+
+    def _chain_lengths(self) -> Iterator[int]:
+        """ Yields the length of every run of occupied slots, the probing analogue of a bucket """
+        run = 0
+        for k in self._keys:
+            if k is _EMPTY:
+                if run:
+                    yield run
+                run = 0
+            else:
+                run += 1
+        if run:
+            yield run
+
+    def stats(self) -> dict:
+        """ Returns chain lengths, load factor and, with track_stats=True, probe and resize counters """
+        return TableStats.report(self._stats, self._size, len(self._keys), self._chain_lengths())
+
+    def save(self, path: str):
+        """ Saves int keys and int (or nested table) values in a file that open_mmap() can serve """
+        save_snapshot(self, path)
+
+    def size(self):
+        """ Returns the number of entries. Must take O(1) time """
+        return self._size
+
+
+class SmallAdjacency:
+    """
+    Adjacency of a low-degree vertex: neighbours and weights in two compact arrays, searched linearly.
+    Graph swaps it for a full table once the degree passes its compact_threshold
+    """
+
+    __slots__ = ('_keys', '_weights')
+
+    def __init__(self):
+        self._keys = array('q')
+        self._weights = array('q')
+
+    @staticmethod
+    def fits(key, value=0) -> bool:
+        """
+        Whether the pair reads back unchanged from int64 arrays; Graph promotes the vertex to a table otherwise.
+        Floats don't fit: converting the weights to doubles would turn every int weight into a float
+        """
+        return (type(key) is int and -(1 << 63) <= key < (1 << 63)
+                and type(value) is int and -(1 << 63) <= value < (1 << 63))
+
+    def _index(self, key) -> int:
+        """ Returns the position of the key, or -1 when the key doesn't exist """
+        try:
+            return self._keys.index(key)
+        except (ValueError, TypeError):
+            return -1
+
+    def __setitem__(self, key: int, value):
+        """ Maps the key to the value. If the key already exists, replaces its value with the new one """
+        if not self.fits(key, value):
+            raise TypeError ("key or value doesn't fit in an int64")
+        i = self._index(key)
+        if i < 0:
+            self._keys.append(key)
+            self._weights.append(value)
+        else:
+            self._weights[i] = value
+
+    def update_many(self, items: Iterable[Tuple[int, int]]):
+        for key, value in items:
+            self.__setitem__(key, value)
+
+    def delete(self, key: int):
+        """ Deletes the key. :raise: an exception when the key doesn't exist  """
+        i = self._index(key)
+        if i < 0:
+            raise Exception ("key doesn't exists")
+        del self._keys[i]
+        del self._weights[i]
+
+    def delete_many(self, keys: Iterable[int]) -> int:
+        """ Deletes every existing key in one pass over the arrays. :return: number of keys deleted """
+        doomed = set(keys)
+        kept = [i for i, key in enumerate(self._keys) if key not in doomed]
+        removed = len(self._keys) - len(kept)
+        if removed:
+            self._keys = array('q', [self._keys[i] for i in kept])
+            self._weights = array('q', [self._weights[i] for i in kept])
+        return removed
+
+    def __getitem__(self, key: int):
+        """ :return: value corresponding to the key. Returns None if the key doesn't exist """
+        return self.get(key)
+
+    def get(self, key: int, default=None):
+        """ :return: value corresponding to the key, or default if the key doesn't exist """
+        i = self._index(key)
+        return default if i < 0 else self._weights[i]
+
+    def __contains__(self, key) -> bool:
+        return self._index(key) >= 0
+
+    def _iter_items(self, field: Optional[int]) -> Iterator:
+        """ Yields field 0 (keys), 1 (values) or, for None, (key, value) pairs of every entry """
+        if field == 0:
+            return iter(self._keys)
+        if field == 1:
+            return iter(self._weights)
+        return zip(self._keys, self._weights)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def keys(self) -> TableKeysView:
+        """ Returns a view of all existing keys """
+        return TableKeysView(self)
+
+    def values(self) -> TableValuesView:
+        """ Returns a view of all existing values """
+        return TableValuesView(self)
+
+    def items(self) -> TableItemsView:
+        """ Returns a view of all existing (key, value) pairs """
+        return TableItemsView(self)
+
+    def reserve(self, n: int):
+        """ Arrays grow by themselves, nothing to reserve """
+
+    def shrink_to_fit(self):
+        """ Arrays never hold spare slots worth returning """
+
+    def size(self):
+        """ Returns the number of entries. Must take O(1) time """
+        return len(self._keys)
+
+
+class ConcurrentHashTable(Generic[K, V]):
+    """
+    A thread-safe HashTable split into independently locked segments.
+    A key lives in segment hash % segments, so a resize only ever blocks one segment
+    """
+
+    def __init__(self, get_hash: Callable[[K], int], segments=16, capacity=4, table_cls=HashTable):
+        self.get_hash = get_hash  # hash function
+        # Segments index their buckets with the remaining bits of the hash
+        self._segments = [table_cls(lambda key: get_hash(key) // segments, capacity) for _ in range(segments)]
+        self._locks = [threading.Lock() for _ in range(segments)]
+
+    def _locate(self, key: K):
+        """ :return: (segment table, its lock, hash within the segment) for the key """
+        h, s = divmod(self.get_hash(key), len(self._segments))
+        return self._segments[s], self._locks[s], h
+
+    def __setitem__(self, key: K, value: V):
+        """ Maps the key to the value. If the key already exists, replaces its value with the new one """
+        table, lock, h = self._locate(key)
+        with lock:
+            table._put(key, value, h)
+
+    def __getitem__(self, key: K) -> Optional[V]:
+        """ :return: value corresponding to the key. Returns None if the key doesn't exist """
+        return self.get(key)
+
+    def get(self, key: K, default=None):
+        """ :return: value corresponding to the key, or default if the key doesn't exist """
+        table, lock, h = self._locate(key)
+        with lock:
+            return table._get(key, h, default)
+
+    def __contains__(self, key) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def get_or_insert(self, key: K, factory: Callable[[], V]) -> V:
+        """
+        Atomically returns the value of the key, inserting factory() first when the key doesn't exist.
+        factory runs under the segment lock, so it must not access this table
+        """
+        table, lock, h = self._locate(key)
+        with lock:
+            value = table._get(key, h, _MISSING)
+            if value is _MISSING:
+                value = factory()
+                table._put(key, value, h)
+            return value
+
+    def delete(self, key: K):
+        """ Deletes the key from the HashTable. :raise: an exception when the key doesn't exist  """
+        table, lock, h = self._locate(key)
+        with lock:
+            if not table._remove(key, h):
+                raise Exception ("key doesn't exists")
+
+    def update_many(self, items: Iterable[Tuple[K, V]]):
+        """ Maps every (key, value) pair, taking each segment lock once """
+        n = len(self._segments)
+        batches: List[List[Tuple[K, V, int]]] = [[] for _ in range(n)]
+        for key, value in items:
+            h, s = divmod(self.get_hash(key), n)
+            batches[s].append((key, value, h))
+        for table, lock, batch in zip(self._segments, self._locks, batches):
+            if not batch:
+                continue
+            with lock:
+                table.reserve(table.size() + len(batch))
+                for key, value, h in batch:
+                    table._put(key, value, h)
+
+    def items(self) -> List[Tuple[K, V]]:
+        """ Returns a snapshot of all (key, value) pairs, consistent per segment """
+        result = []
+        for table, lock in zip(self._segments, self._locks):
+            with lock:
+                result.extend(table.items())
+        return result
+
+    def keys(self) -> List[K]:
+        """ Returns a snapshot of all existing keys """
+        return [kv[0] for kv in self.items()]
+
+    def values(self) -> List[V]:
+        """ Returns a snapshot of all existing values """
+        return [kv[1] for kv in self.items()]
+
+    def __iter__(self) -> Iterator[K]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return self.size()
+
+    def size(self):
+        """ Returns the number of entries """
+        return sum(table.size() for table in self._segments)
+
+
+# Binary snapshot format for tables with int64 keys and values (native byte order):
+#   file:  magic (8 bytes), offset of the root table (int64), tables...
+#   table: capacity, size, nested flag (int64 each), keys[capacity], values[capacity] (int64),
+#          used[capacity] (one byte per slot, padded to 8 bytes)
+# Slots are found by linear probing from splitmix64(key) % capacity. In a nested table each value is the
+# file offset of another table, which is how the adjacency tables of Graph.g are stored.
+_SNAPSHOT_MAGIC = b'HTSNAP01'
+_TABLE_HEADER = struct.Struct('=qqq')
+
+
+def _write_snapshot_table(f, items: List[Tuple[int, object]]) -> int:
+    """ Writes a table (and first its nested tables) to the file. :return: offset of the table """
+    nested = any(hasattr(value, 'items') for _, value in items)
+    if nested:
+        items = [(key, _write_snapshot_table(f, list(value.items()))) for key, value in items]
+    capacity = 4
+    while len(items) > capacity / 2:
+        capacity *= 2
+    keys = array('q', bytes(8 * capacity))
+    values = array('q', bytes(8 * capacity))
+    used = bytearray(-(-capacity // 8) * 8)
+    mask = capacity - 1
+    for key, value in items:
+        i = splitmix64(key) & mask
+        while used[i]:
+            i = (i + 1) & mask
+        keys[i] = key
+        values[i] = value
+        used[i] = 1
+    offset = f.tell()
+    f.write(_TABLE_HEADER.pack(capacity, len(items), int(nested)))
+    f.write(keys.tobytes())
+    f.write(values.tobytes())
+    f.write(used)
+    return offset
+
+
+def save_snapshot(table, path: str):
+    """ Saves a table with int keys and int (or nested table) values in the snapshot format """
+    with open(path, 'wb') as f:
+        f.write(_SNAPSHOT_MAGIC)
+        f.write(bytes(8))
+        root = _write_snapshot_table(f, list(table.items()))
+        f.seek(len(_SNAPSHOT_MAGIC))
+        f.write(struct.pack('=q', root))
+
+
+def _map_file(path: str) -> mmap.mmap:
+    """ Maps a whole file read-only; processes mapping the same file share its pages """
+    with open(path, 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def open_mmap(path: str) -> 'MappedHashTable':
+    """ Opens a snapshot written by save() for read-only lookups straight from the page cache """
+    buf = _map_file(path)
+    if buf[:len(_SNAPSHOT_MAGIC)] != _SNAPSHOT_MAGIC:
+        raise Exception ("Not a HashTable snapshot")
+    root, = struct.unpack_from('=q', buf, len(_SNAPSHOT_MAGIC))
+    return MappedHashTable(buf, root)
+
+
+class MappedHashTable:
+    """
+    A read-only HashTable served from a snapshot buffer without deserializing it
+    """
+
+    def __init__(self, buf, offset: int):
+        self._buf = buf
+        capacity, self._size, nested = _TABLE_HEADER.unpack_from(buf, offset)
+        self._nested = bool(nested)
+        view = memoryview(buf)
+        start = offset + _TABLE_HEADER.size
+        self._keys = view[start:start + 8 * capacity].cast('q')
+        start += 8 * capacity
+        self._values = view[start:start + 8 * capacity].cast('q')
+        start += 8 * capacity
+        self._used = view[start:start + capacity]
+
+    def _slot(self, key: int) -> int:
+        """ Returns the slot holding the key, or -1 when the key doesn't exist """
+        keys, used = self._keys, self._used
+        mask = len(keys) - 1
+        i = splitmix64(key) & mask
+        while used[i]:
+            if keys[i] == key:
+                return i
+            i = (i + 1) & mask
+        return -1
+
+    def _value(self, i: int):
+        value = self._values[i]
+        return MappedHashTable(self._buf, value) if self._nested else value
+
+    def __getitem__(self, key: int):
+        """ :return: value corresponding to the key. Returns None if the key doesn't exist """
+        return self.get(key)
+
+    def get(self, key: int, default=None):
+        """ :return: value corresponding to the key, or default if the key doesn't exist """
+        i = self._slot(key)
+        return default if i < 0 else self._value(i)
+
+    def __contains__(self, key) -> bool:
+        return self._slot(key) >= 0
+
+    def __setitem__(self, key, value):
+        raise Exception ("Snapshot is read-only")
+
+    def delete(self, key):
+        raise Exception ("Snapshot is read-only")
+
+    def _iter_items(self, field: Optional[int]) -> Iterator:
+        """ Yields field 0 (keys), 1 (values) or, for None, (key, value) pairs of every entry """
+        keys = self._keys
+        for i, used in enumerate(self._used):
+            if not used:
+                continue
+            if field is None:
+                yield keys[i], self._value(i)
+            else:
+                yield keys[i] if field == 0 else self._value(i)
+
+    def __iter__(self) -> Iterator[int]:
+        return self._iter_items(0)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def keys(self) -> TableKeysView:
+        """ Returns a view of all existing keys """
+        return TableKeysView(self)
+
+    def values(self) -> TableValuesView:
+        """ Returns a view of all existing values """
+        return TableValuesView(self)
+
+    def items(self) -> TableItemsView:
+        """ Returns a view of all existing (key, value) pairs """
+        return TableItemsView(self)
+
+    def size(self):
+        """ Returns the number of entries. Must take O(1) time """
+        return self._size
+
+
+class DisjointSetUnion:
+    def __init__(self, table_cls=HashTable, get_hash: Callable[[int], int] = splitmix64_hash):
+        self.parent: HashTable[int, int] = table_cls(get_hash)
+        self.size: HashTable[int, int] = table_cls(get_hash)
+
+    def create_set(self, u: int):
+        """ Creates a set consisting of a single element u """
+        self.parent[u] = u
+        self.size[u] = 1
+
+    def find_set(self, u: int) -> int:
+        """
+        Returns an element representing a set containing u.
+        For all elements from the set, find_set returns the same item
+        """
+        root = u
+        while True:
+            v = self.parent[root]
+            if v == root:
+                break
+            root = v
+        # Path compression, done iteratively so long chains can't hit the recursion limit
+        while u != root:
+            v = self.parent[u]
+            self.parent[u] = root
+            u = v
+        return root
+
+    def union(self, u: int, v: int):
+        """
+        Merge sets containing u and v
+        Now all elements from these sets have the same representative
+        """
+        pu = self.find_set(u)
+        pv = self.find_set(v)
+        if pu == pv:
+            return
+        if self.size[pu] > self.size[pv]:
+            self.parent[pv] = pu
+            self.size[pu] = self.size[pu] + self.size[pv]
+        else:
+            self.parent[pu] = pv
+            self.size[pv] = self.size[pu] + self.size[pv]
+
+
+class DenseDisjointSetUnion:
+    """
+    A DisjointSetUnion over the elements 0..n-1, keeping parent and size in flat int arrays
+    """
+
+    def __init__(self, n: int):
+        self.parent = array('q', range(n))
+        self.size = array('q', [1]) * n
+
+    def find_set(self, u: int) -> int:
+        """
+        Returns an element representing a set containing u.
+        For all elements from the set, find_set returns the same item
+        """
+        parent = self.parent
+        while parent[u] != u:
+            parent[u] = parent[parent[u]]  # path halving
+            u = parent[u]
+        return u
+
+    def union(self, u: int, v: int) -> bool:
+        """
+        Merge sets containing u and v. :return: False when they were already in the same set
+        """
+        pu = self.find_set(u)
+        pv = self.find_set(v)
+        if pu == pv:
+            return False
+        size = self.size
+        if size[pu] > size[pv]:
+            pu, pv = pv, pu
+        self.parent[pu] = pv
+        size[pv] += size[pu]
+        return True
+
+    def find_many(self, xs: Iterable[int]) -> List[int]:
+        """ Returns find_set of every element """
+        parent = self.parent
+        roots = []
+        for u in xs:
+            while parent[u] != u:
+                parent[u] = parent[parent[u]]
+                u = parent[u]
+            roots.append(u)
+        return roots
+
+    def union_many(self, us: Iterable[int], vs: Iterable[int]) -> List[bool]:
+        """ Unions every pair (us[i], vs[i]) in order. :return: for each pair, whether it merged two sets """
+        parent, size = self.parent, self.size
+        merged = []
+        for u, v in zip(us, vs):
+            while parent[u] != u:
+                parent[u] = parent[parent[u]]
+                u = parent[u]
+            while parent[v] != v:
+                parent[v] = parent[parent[v]]
+                v = parent[v]
+            if u == v:
+                merged.append(False)
+                continue
+            if size[u] > size[v]:
+                u, v = v, u
+            parent[u] = v
+            size[v] += size[u]
+            merged.append(True)
+        return merged
+
+
+class RollbackDisjointSetUnion:
+    """
+    A DisjointSetUnion over the elements 0..n-1 whose unions can be undone.
+    Union by size without path compression keeps every find at O(log n), and since
+    find never rewrites parents, undoing a union only restores two array slots.
+    This is the building block of offline dynamic connectivity: walk a segment tree
+    over edge lifetimes, union an interval's edges on the way down, roll them back on the way up
+    """
+
+    def __init__(self, n: int):
+        self.parent = array('q', range(n))
+        self.size = array('q', [1]) * n
+        self._history: List[int] = []  # roots attached to another root, in union order
+
+    def find_set(self, u: int) -> int:
+        """
+        Returns an element representing a set containing u.
+        For all elements from the set, find_set returns the same item
+        """
+        parent = self.parent
+        while parent[u] != u:
+            u = parent[u]
+        return u
+
+    def connected(self, u: int, v: int) -> bool:
+        return self.find_set(u) == self.find_set(v)
+
+    def union(self, u: int, v: int) -> bool:
+        """
+        Merge sets containing u and v. :return: False when they were already in the same set
+        """
+        pu = self.find_set(u)
+        pv = self.find_set(v)
+        if pu == pv:
+            return False
+        size = self.size
+        if size[pu] > size[pv]:
+            pu, pv = pv, pu
+        self.parent[pu] = pv
+        size[pv] += size[pu]
+        self._history.append(pu)
+        return True
+
+    def snapshot(self) -> int:
+        """ Returns a marker of the current state for rollback() """
+        return len(self._history)
+
+    def rollback(self, to: int):
+        """ Undoes every union made after snapshot() returned the marker to """
+        if to < 0:
+            raise Exception ("Snapshot marker can't be negative")
+        if to > len(self._history):
+            raise Exception ("Snapshot is newer than the current state")
+        parent, size, history = self.parent, self.size, self._history
+        while len(history) > to:
+            pu = history.pop()
+            pv = parent[pu]
+            size[pv] -= size[pu]
+            parent[pu] = pu
+
+
+class LinkCutTree:
+    """
+    Link-cut tree: a forest of rooted trees, each split into preferred paths kept in splay trees.
+    Every node carries a value, and path_max finds the node with the largest value on a tree path.
+    All operations take O(log n) amortized time
+    """
+
+    def __init__(self):
+        self.left: List[int] = []
+        self.right: List[int] = []
+        self.parent: List[int] = []  # splay parent, or path-parent pointer of a splay root
+        self.flipped = bytearray()  # pending reversal: the children of the node still have to be swapped
+        self.value: list = []
+        self.best: List[int] = []  # node with the largest value in the splay subtree
+        self._free: List[int] = []
+
+    def add_node(self, value) -> int:
+        """ Adds a single-node tree. :return: its id """
+        if self._free:
+            x = self._free.pop()
+            self.left[x] = self.right[x] = self.parent[x] = -1
+            self.flipped[x] = 0
+            self.value[x] = value
+            self.best[x] = x
+            return x
+        x = len(self.value)
+        self.left.append(-1)
+        self.right.append(-1)
+        self.parent.append(-1)
+        self.flipped.append(0)
+        self.value.append(value)
+        self.best.append(x)
+        return x
+
+    def remove_node(self, x: int):
+        """ Releases the id of a node that has been cut from everything """
+        self._free.append(x)
+
+    def _is_root(self, x: int) -> bool:
+        """ Whether x is the root of its splay tree """
+        p = self.parent[x]
+        return p < 0 or (self.left[p] != x and self.right[p] != x)
+
+    def _pull(self, x: int):
+        value, best = self.value, self.best
+        b = x
+        for c in (self.left[x], self.right[x]):
+            if c >= 0 and value[best[c]] > value[b]:
+                b = best[c]
+        best[x] = b
+
+    def _push(self, x: int):
+        if self.flipped[x]:
+            l, r = self.left[x], self.right[x]
+            self.left[x], self.right[x] = r, l
+            if l >= 0:
+                self.flipped[l] ^= 1
+            if r >= 0:
+                self.flipped[r] ^= 1
+            self.flipped[x] = 0
+
+    def _rotate(self, x: int):
+        left, right, parent = self.left, self.right, self.parent
+        p = parent[x]
+        g = parent[p]
+        if not self._is_root(p):
+            if left[g] == p:
+                left[g] = x
+            else:
+                right[g] = x
+        parent[x] = g
+        if left[p] == x:
+            b = right[x]
+            left[p] = b
+            right[x] = p
+        else:
+            b = left[x]
+            right[p] = b
+            left[x] = p
+        if b >= 0:
+            parent[b] = p
+        parent[p] = x
+        self._pull(p)
+        self._pull(x)
+
+    def _splay(self, x: int):
+        path = [x]
+        while not self._is_root(path[-1]):
+            path.append(self.parent[path[-1]])
+        for y in reversed(path):
+            self._push(y)
+        while not self._is_root(x):
+            p = self.parent[x]
+            if not self._is_root(p):
+                g = self.parent[p]
+                self._rotate(p if (self.left[g] == p) == (self.left[p] == x) else x)
+            self._rotate(x)
+
+    def _access(self, x: int):
+        """ Makes the root-to-x path preferred, with x at the root of its splay tree """
+        last = -1
+        y = x
+        while y >= 0:
+            self._splay(y)
+            self.right[y] = last
+            self._pull(y)
+            last = y
+            y = self.parent[y]
+        self._splay(x)
+
+    def make_root(self, x: int):
+        self._access(x)
+        self.flipped[x] ^= 1
+
+    def find_root(self, x: int) -> int:
+        self._access(x)
+        while True:
+            self._push(x)
+            if self.left[x] < 0:
+                break
+            x = self.left[x]
+        self._splay(x)
+        return x
+
+    def connected(self, x: int, y: int) -> bool:
+        return x == y or self.find_root(x) == self.find_root(y)
+
+    def link(self, x: int, y: int):
+        """ Adds the tree edge x-y. x and y must be in different trees """
+        self.make_root(x)
+        self.parent[x] = y
+
+    def cut(self, x: int, y: int):
+        """ Removes the tree edge x-y """
+        self.make_root(x)
+        self._access(y)
+        # The path is now x-y, so x is the whole left subtree of y
+        self.left[y] = -1
+        self.parent[x] = -1
+        self._pull(y)
+
+    def path_max(self, x: int, y: int) -> int:
+        """ :return: the node with the largest value on the tree path x..y """
+        self.make_root(x)
+        self._access(y)
+        return self.best[y]
+
+
+class MaintainedMST:
+    """
+    Minimum spanning forest of a Graph kept up to date as edges are inserted.
+    The forest lives in a link-cut tree where every tree edge is a node valued by its weight. A new edge
+    between two trees is linked; one closing a cycle replaces the heaviest edge of that cycle if it is lighter.
+    Deleting a forest edge can't be repaired this way, so the forest is recomputed on the next query
+    """
+
+    def __init__(self, graph: 'Graph'):
+        self.graph = graph
+        self.rebuild()
+
+    def rebuild(self):
+        """ Recomputes the forest from the graph """
+        self._tree = LinkCutTree()
+        self._nodes: Dict[int, int] = {}  # vertex -> node
+        self._edges: Dict[frozenset, int] = {}  # forest edge _edge_key(u, v) -> node
+        self._ends: Dict[int, Tuple[int, int]] = {}  # edge node -> (u, v)
+        self.total = 0
+        self.stale = False
+        for u in self.graph.g:
+            self.add_vertex(u)
+        for u, v in self.graph._kruskal()[0]:
+            self.insert(u, v, self.graph.g[u][v])
+
+    def add_vertex(self, u: int):
+        self._nodes[u] = self._tree.add_node(-_INF)
+
+    def _link(self, u: int, v: int, w):
+        e = self._tree.add_node(w)
+        self._tree.link(self._nodes[u], e)
+        self._tree.link(e, self._nodes[v])
+        self._edges[_edge_key(u, v)] = e
+        self._ends[e] = (u, v)
+        self.total += w
+
+    def _cut(self, e: int):
+        u, v = self._ends.pop(e)
+        del self._edges[_edge_key(u, v)]
+        self._tree.cut(self._nodes[u], e)
+        self._tree.cut(e, self._nodes[v])
+        self.total -= self._tree.value[e]
+        self._tree.remove_node(e)
+
+    def insert(self, u: int, v: int, w):
+        """ Updates the forest for a new edge u-v of weight w in O(log V) amortized """
+        if self.stale or u == v:
+            return
+        nu, nv = self._nodes[u], self._nodes[v]
+        if not self._tree.connected(nu, nv):
+            self._link(u, v, w)
+            return
+        heaviest = self._tree.path_max(nu, nv)
+        if self._tree.value[heaviest] > w:
+            self._cut(heaviest)
+            self._link(u, v, w)
+
+    def remove(self, u: int, v: int):
+        """ Notes the deletion of edge u-v """
+        if _edge_key(u, v) in self._edges:
+            self.stale = True
+
+    def remove_vertex(self, u: int):
+        self.stale = True
+
+    def result(self) -> Tuple[List[Tuple[int, int]], int]:
+        """ :return: (edges, total weight) of the current minimum spanning forest """
+        if self.stale:
+            self.rebuild()
+        return list(self._ends.values()), self.total
+
+
+class ComponentIndex:
+    """
+    Connected components of a Graph, kept in a DisjointSetUnion that create_vertex and create_edge update.
+    Unions can't be undone, so a deletion marks the index stale until connected() or a component_* call rebuilds it
+    """
+
+    def __init__(self, graph: 'Graph'):
+        self.graph = graph
+        self.rebuild()
+
+    def rebuild(self):
+        """ Recomputes the components from the graph """
+        self._dsu = DisjointSetUnion(self.graph.table_cls, self.graph.get_hash)
+        self.count = 0
+        self.stale = False
+        for u in self.graph.g:
+            self.add_vertex(u)
+        for u, adjacency in self.graph.g.items():
+            for v in adjacency:
+                self.insert(u, v)
+
+    def add_vertex(self, u: int):
+        self._dsu.create_set(u)
+        self.count += 1
+
+    def insert(self, u: int, v: int):
+        """ Notes the insertion of edge u-v """
+        if self._dsu.find_set(u) != self._dsu.find_set(v):
+            self._dsu.union(u, v)
+            self.count -= 1
+
+    def remove(self, u: int, v: int):
+        """ Notes the deletion of edge u-v, which may split a component """
+        if u != v:
+            self.stale = True
+
+    def remove_vertex(self, u: int):
+        self.stale = True
+
+    def component_of(self, u: int) -> int:
+        """ :return: the representative of the component of u. :raise: an exception when u isn't a vertex """
+        if self.stale:
+            self.rebuild()
+        if u not in self._dsu.parent:
+            raise Exception ("Vertex doesn't Exists")
+        return self._dsu.find_set(u)
+
+    def connected(self, u: int, v: int) -> bool:
+        """ Whether v is reachable from u """
+        return self.component_of(u) == self.component_of(v)
+
+    def component_size(self, u: int) -> int:
+        """ Number of vertices reachable from u, u included """
+        return self._dsu.size[self.component_of(u)]
+
+    def component_count(self) -> int:
+        if self.stale:
+            self.rebuild()
+        return self.count
+
+    def component_sizes(self) -> Dict[int, int]:
+        """ :return: representative -> size of every component """
+        if self.stale:
+            self.rebuild()
+        return {u: self._dsu.size[u] for u, p in self._dsu.parent.items() if u == p}
+
+
+class ShortestPathCache:
+    """
+    LRU cache of shortest paths of one Graph, keyed on (u, v), plus the shortest-path trees of recent sources.
+    Everything is dropped as soon as the graph's version differs from the one the entries were computed at
+    """
+
+    def __init__(self, maxsize=1024, max_trees=16):
+        self.maxsize = maxsize
+        self.max_trees = max_trees
+        self.hits = 0
+        self.misses = 0
+        self._version = -1
+        self._paths: 'OrderedDict[Tuple[int, int], Optional[List[int]]]' = OrderedDict()  # None: unreachable
+        # source -> (dist, pred, complete); dist holds settled vertices, complete when the search wasn't cut short
+        self._trees: 'OrderedDict[int, tuple]' = OrderedDict()
 
-    def __setitem__(self, key: K, value: V):
-        """ Maps the key to the value. If the key already exists, replaces its value with the new one """
+    def _sync(self, version: int):
+        if version != self._version:
+            self._paths.clear()
+            self._trees.clear()
+            self._version = version
 
-        index = self.get_hash(key) % len(self.elements)
-        temp=self.__getitem__(key)
-        if temp is None:
-            if(self._size+1 > len(self.elements)/2):
-                self.double_capacity()
-            index = self.get_hash(key) % len(self.elements)
-            self.elements[index].append((key,value))
-            self._size+=1
-        else:
-            for kv in self.elements[index]:
-                if kv[0] == key:
-                    ind=self.elements[index].index(kv)
-                    self.elements[index].remove(kv)
-                    self.elements[index].insert(ind,(key,value))              
-        return
-        ...
+    def lookup(self, version: int, u: int, v: int):
+        """ :return: the cached path (None when unreachable), or _MISSING on a miss """
+        self._sync(version)
+        key = (u, v)
+        if key in self._paths:
+            self._paths.move_to_end(key)
+            self.hits += 1
+            return self._paths[key]
+        tree = self._trees.get(u)
+        if tree is not None:
+            dist, pred, complete = tree
+            if v in dist or complete:
+                self._trees.move_to_end(u)
+                self.hits += 1
+                return Graph._path(pred, v) if v in dist else None
+        self.misses += 1
+        return _MISSING
 
-    def delete(self, key: K):
-        """ Deletes the key from the HashTable. :raise: an exception when the key doesn't exist  """
-        temp=self.__getitem__(key)
-        if temp is None:
-            raise Exception ("key doesn't exists")
-        else:
-            index = self.get_hash(key) % len(self.elements)
-            for kv in self.elements[index]:
-                if kv[0] == key:
-                    self.elements[index].remove(kv)
-            self._size-=1
+    def store_path(self, version: int, u: int, v: int, path: Optional[List[int]]):
+        self._sync(version)
+        self._paths[(u, v)] = path
+        self._paths.move_to_end((u, v))
+        if len(self._paths) > self.maxsize:
+            self._paths.popitem(last=False)
 
-    # Allows one to use square brackets: hash_table[key].
-    # Check https://docs.python.org/3/reference/datamodel.html#object.__getitem__
-    def __getitem__(self, key: K) -> Optional[V]:
-        """ :return: value corresponding to the key. Returns None if the key doesn't exist """
-        index=self.get_hash(key) % len(self.elements)
-        temp=self.elements[index]
-        if len(temp)==0:
+    def store_tree(self, version: int, u: int, dist: Dict[int, int], pred: Dict[int, Optional[int]], complete: bool):
+        """ Keeps the tree of a Dijkstra run from u so later queries from u can be answered without searching """
+        self._sync(version)
+        if self.max_trees <= 0:
+            return
+        self._trees[u] = (dist, pred, complete)
+        self._trees.move_to_end(u)
+        if len(self._trees) > self.max_trees:
+            self._trees.popitem(last=False)
+
+    def lookup_tree(self, version: int, u: int):
+        """ :return: the complete (dist, pred) tree of u, or None """
+        self._sync(version)
+        tree = self._trees.get(u)
+        if tree is None or not tree[2]:
+            self.misses += 1
             return None
-        else:
-            for kv in temp:
-                if(kv[0]==key):
-                    return kv[1]
-        ...
+        self._trees.move_to_end(u)
+        self.hits += 1
+        return tree[0], tree[1]
 
-    def keys(self) -> List[K]:
-        """ Returns all existing keys """
-        keylist=[]
-        for ele in self.elements:
-            for kv in ele:
-                keylist.append(kv[0])          
-        return keylist
-        ...
+    def stats(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses, 'paths': len(self._paths), 'trees': len(self._trees),
+                'maxsize': self.maxsize}
 
-    def size(self):
-        """ Returns the number of entries. Must take O(1) time """
-        return self._size
-        ...
 
+class Graph:
+    def __init__(self, table_cls=HashTable, get_hash: Callable[[int], int] = splitmix64_hash, compact_threshold=8):
+        # Map from vertices to adjacency HashTables
+        self.table_cls = table_cls  # HashTable or OpenAddressingHashTable
+        self.get_hash = get_hash  # hash function of every table of the graph
+        # Vertices start with a SmallAdjacency and move to a table_cls table past this degree; 0 disables it
+        self.compact_threshold = compact_threshold
+        self.g: HashTable[int, HashTable[int, int]] = table_cls(get_hash)
+        self.version = 0  # bumped by every change to the vertices or edges
+        self.path_cache: Optional[ShortestPathCache] = None
+        self.maintained_mst: Optional[MaintainedMST] = None
+        self.components: Optional[ComponentIndex] = None
 
-class DisjointSetUnion:
-    def __init__(self):
-        self.parent: HashTable[int, int] = HashTable(lambda u: u)
-        self.size: HashTable[int, int] = HashTable(lambda u: u)
+    def enable_path_cache(self, maxsize=1024, max_trees=16) -> ShortestPathCache:
+        """ Puts an LRU cache in front of shortest_path, invalidated by any change to the graph """
+        self.path_cache = ShortestPathCache(maxsize, max_trees)
+        return self.path_cache
 
-    def create_set(self, u: int):
-        """ Creates a set consisting of a single element u """
-        self.parent[u] = u
-        self.size[u] = 1
+    def disable_path_cache(self):
+        self.path_cache = None
 
-    def find_set(self, u: int) -> int:
-        """
-        Returns an element representing a set containing u.
-        For all elements from the set, find_set returns the same item
-        """
-        v = self.parent[u]
-        if v == u:
-            return u
-        root = self.find_set(v)
-        self.parent[u] = root
-        return root
+    def maintain_mst(self) -> MaintainedMST:
+        """ Keeps a minimum spanning forest updated on every create_edge; mst() then just reads it """
+        self.maintained_mst = MaintainedMST(self)
+        return self.maintained_mst
 
-    def union(self, u: int, v: int):
-        """
-        Merge sets containing u and v
-        Now all elements from these sets have the same representative
-        """
-        pu = self.find_set(u)
-        pv = self.find_set(v)
-        if self.size[pu] > self.size[pv]:
-            self.parent[pv] = pu
-            self.size[pu] = self.size[pu] + self.size[pv]
-        else:
-            self.parent[pu] = pv
-            self.size[pv] = self.size[pu] + self.size[pv]
+    def maintain_components(self) -> ComponentIndex:
+        """ Keeps a connected-components index; while it is fresh, shortest_path rejects unreachable pairs up front """
+        self.components = ComponentIndex(self)
+        return self.components
 
+    def connected(self, u: int, v: int) -> bool:
+        """ Whether v is reachable from u, answered by the component index (built on first use) """
+        if self.components is None:
+            self.maintain_components()
+        return self.components.connected(u, v)
 
-class Graph:
-    def __init__(self):
-        # Map from vertices to adjacency HashTables
-        self.g: HashTable[int, HashTable[int, int]] = HashTable(lambda u: u)
+    def _new_adjacency(self):
+        return SmallAdjacency() if self.compact_threshold > 0 else self.table_cls(self.get_hash)
+
+    def _add_neighbors(self, u: int, temp, entries: List[Tuple[int, int]]):
+        """ Adds (neighbour, weight) entries to the adjacency temp of u, promoting it past compact_threshold """
+        if isinstance(temp, SmallAdjacency) and (len(temp) + len(entries) > self.compact_threshold
+                                                 or not all(SmallAdjacency.fits(v, w) for v, w in entries)):
+            # Sized up front like reserve() would, so the new table never rebuilds its buckets while filling
+            capacity = 4
+            while len(temp) + len(entries) > capacity / 2:
+                capacity *= 2
+            promoted = self.table_cls(self.get_hash, capacity)
+            promoted.update_many(list(temp.items()) + entries)
+            self.g[u] = promoted
+        else:
+            temp.update_many(entries)
 
     def create_edge(self, u: int, v: int, w: int):
         temp_u=self.g.__getitem__(u)
@@ -150,9 +1586,14 @@ class Graph:
         if(self.has_edge(u,v)):
             raise Exception ("Edge Already Exists")
             
-        temp_u.__setitem__(v,w)
-        temp_v.__setitem__(u,w)
-        ...
+        self._add_neighbors(u, temp_u, [(v, w)])
+        if u != v:
+            self._add_neighbors(v, temp_v, [(u, w)])
+        self.version += 1
+        if self.maintained_mst is not None:
+            self.maintained_mst.insert(u, v, w)
+        if self.components is not None:
+            self.components.insert(u, v)
 
     def delete_edge(self, u: int, v: int):
         temp_u=self.g.__getitem__(u)
@@ -161,36 +1602,88 @@ class Graph:
             raise Exception ("Edge doesn't Exists")
         
         temp_u.delete(v)
-        temp_v.delete(u)
-        ...
+        if u != v:
+            temp_v.delete(u)
+        self.version += 1
+        if self.maintained_mst is not None:
+            self.maintained_mst.remove(u, v)
+        if self.components is not None:
+            self.components.remove(u, v)
 
     def has_edge(self, u: int, v: int) -> bool:
         temp=self.g.__getitem__(u)
-        if v in temp.keys():
-            return True
-        else:
-            return False
-        ...
+        if temp is None:
+            raise Exception ("Vertex doesn't Exists")
+        return v in temp
 
     def create_vertex(self, u: int):
         temp=self.g.__getitem__(u)
         if temp is None:
-            self.g.__setitem__(u,HashTable(lambda u: u))
+            self.g.__setitem__(u,self._new_adjacency())
+            self.version += 1
+            if self.maintained_mst is not None:
+                self.maintained_mst.add_vertex(u)
+            if self.components is not None:
+                self.components.add_vertex(u)
         else:
             raise Exception ("Vertex Already Exists")
-        ...
 
     def delete_vertex(self, u: int):
-            
-        u_neighbours=self.neighbours(u)
-        for neigh in u_neighbours:
-            temp=neigh.__getitem__(u)
-            if temp is not None:
-                neigh.delete(u)
-        
-        self.g.delete(u)
-    
-        ...
+        self.delete_vertices((u,))
+
+    def delete_vertices(self, vertices: Iterable[int]):
+        """
+        Deletes the vertices and their edges. Costs O(total degree of the vertices): each surviving
+        neighbour loses all its doomed entries in one delete_many, so every table shrinks at most once.
+        Nothing is deleted if one of the vertices doesn't exist
+        """
+        g = self.g
+        doomed = list(dict.fromkeys(vertices))
+        for u in doomed:
+            if g[u] is None:
+                raise Exception ("Vertex doesn't Exists")
+        doomed_set = set(doomed)
+        pending: Dict[int, List[int]] = {}
+        for u in doomed:
+            for n in g[u].keys():
+                if n not in doomed_set:
+                    pending.setdefault(n, []).append(u)
+        for n, gone in pending.items():
+            g[n].delete_many(gone)
+        g.delete_many(doomed)
+        if doomed:
+            self.version += 1
+            if self.maintained_mst is not None:
+                for u in doomed:
+                    self.maintained_mst.remove_vertex(u)
+            if self.components is not None:
+                self.components.remove_vertex(doomed[0])
+
+    def delete_edges(self, edges: Iterable[Tuple[int, int]]):
+        """
+        Deletes the (u, v) edges, grouped per endpoint so that every adjacency table shrinks at most once.
+        Nothing is deleted if one of the edges doesn't exist
+        """
+        g = self.g
+        doomed = list({_edge_key(u, v): (u, v) for u, v in edges}.values())
+        for u, v in doomed:
+            if not self.has_edge(u, v):
+                raise Exception ("Edge doesn't Exists")
+        pending: Dict[int, List[int]] = {}
+        for u, v in doomed:
+            pending.setdefault(u, []).append(v)
+            if u != v:
+                pending.setdefault(v, []).append(u)
+        for u, gone in pending.items():
+            g[u].delete_many(gone)
+        if doomed:
+            self.version += 1
+            if self.maintained_mst is not None:
+                for u, v in doomed:
+                    self.maintained_mst.remove(u, v)
+            if self.components is not None:
+                for u, v in doomed:
+                    self.components.remove(u, v)
 
     def degree(self, u: int) -> int:
         temp=self.g.__getitem__(u)
@@ -203,109 +1696,1305 @@ class Graph:
     def neighbors(self, u: int) -> list:
         temp=self.g.__getitem__(u)
         if temp is not None:
-            return temp.keys()
+            return list(temp)
         else:
             raise Exception ("Vertex doesn't Exists")
         ...
 
-    def mst(self) -> List[Tuple[int, int]]:
-        all_valid_edges=[]
-        for vertex in self.g.keys():
-            temp=self.g.__getitem__(vertex)
-            if temp is None:
+    # mst_with_weight picks Prim once there are at least this many edges per vertex, Kruskal below
+    prim_density = 8
+
+    def _kruskal(self) -> Tuple[List[Tuple[int, int]], int]:
+        """ Kruskal over the edge list sorted once by weight, with an array-backed DSU """
+        # Number the vertices 0..n-1 so the DSU lives in flat arrays
+        index: HashTable[int, int] = HashTable(self.get_hash)
+        index.update_many((vertex, i) for i, vertex in enumerate(self.g))
+        edges = []
+        for vertex, temp in self.g.items():
+            i = index[vertex]
+            for neigh, w in temp.items():
+                j = index[neigh]
+                if i < j:  # every edge is stored at both ends, keep one copy
+                    edges.append((w, i, j, vertex, neigh))
+        edges.sort(key=lambda e: e[0])
+        d = DenseDisjointSetUnion(len(index))
+        # An edge whose ends are already in the same set would form a cycle, so it is skipped
+        merged = d.union_many([e[1] for e in edges], [e[2] for e in edges])
+        tree = [e for e, m in zip(edges, merged) if m]
+        return [(e[3], e[4]) for e in tree], sum(e[0] for e in tree)
+
+    def _prim(self) -> Tuple[List[Tuple[int, int]], int]:
+        """
+        Prim from every not yet reached vertex, so disconnected graphs give a spanning forest.
+        The heap has no decrease-key: a cheaper connection pushes a new entry and the old one is skipped when popped
+        """
+        g = self.g
+        in_tree = set()
+        best: Dict[int, int] = {}  # cheapest known connection of every vertex outside the tree
+        tree: List[Tuple[int, int]] = []
+        total = 0
+        tie = count()  # orders equal weights, so vertex IDs are never compared
+        for root in g:
+            if root in in_tree:
                 continue
-            else:
-                for ele in temp.keys():
-                    temp_ele=temp.__getitem__(ele)
-                    if(temp_ele is None):
-                        continue
-                    else:
-                        all_valid_edges.append((vertex,ele,temp_ele))
-                        self.delete_edge(vertex,ele)
-#        print(all_valid_edges)
-        
-#        sort ascending based on weights
-        all_valid_edges.sort(key = lambda x: x[2])
-        
-        #initialize
-        d=DisjointSetUnion()
-        unique_vertex=[]
-        for each_edge in all_valid_edges:
-            if each_edge[0] not in unique_vertex:
-#                print("vb", each_edge[0])
-                #create normal set
-                d.create_set(each_edge[0])
-                unique_vertex.append(each_edge[0])
-            if each_edge[1] not in unique_vertex:
-#                print("vb2", each_edge[1])
-                d.create_set(each_edge[1])
-                unique_vertex.append(each_edge[1])
-#       create mst list
-        mst_list=[]
-
-        for each_edge in all_valid_edges:
-            find_a=d.find_set(each_edge[0])
-            find_b=d.find_set(each_edge[1])
-#            print(find_a,find_b)
-            if(find_a==find_b): # if they are in same set, then cycle will form hence skipping loop
+            heap = [(0, next(tie), root, root)]
+            while heap:
+                w, _, x, parent = heappop(heap)
+                if x in in_tree or w > best.get(x, w):
+                    continue
+                in_tree.add(x)
+                if x != root:
+                    tree.append((parent, x))
+                    total += w
+                for y, wy in g[x].items():
+                    if y not in in_tree and wy < best.get(y, _INF):
+                        best[y] = wy
+                        heappush(heap, (wy, next(tie), y, x))
+        return tree, total
+
+    def mst_with_weight(self, algorithm='auto', workers: Optional[int] = None) -> Tuple[List[Tuple[int, int]], int]:
+        """
+        Minimum spanning forest without modifying the graph.
+        :param algorithm: 'prim', 'kruskal', 'boruvka' (parallel over workers processes, for very large graphs)
+            or 'auto', which reads the maintained forest when maintain_mst() is on, and otherwise
+            picks Prim for dense graphs (see prim_density) and Kruskal for sparse ones
+        :return: (edges, total weight)
+        """
+        if algorithm == 'auto' and self.maintained_mst is not None:
+            return self.maintained_mst.result()
+        if algorithm == 'auto':
+            edges = sum(len(temp) for temp in self.g.values()) // 2
+            algorithm = 'prim' if edges >= self.prim_density * len(self.g) else 'kruskal'
+        if algorithm == 'prim':
+            return self._prim()
+        if algorithm == 'kruskal':
+            return self._kruskal()
+        if algorithm == 'boruvka':
+            return self.freeze().boruvka_mst(workers)
+        raise Exception ("Unknown MST algorithm")
+
+    def mst(self, algorithm='auto', workers: Optional[int] = None) -> List[Tuple[int, int]]:
+        """ Returns the edges of a minimum spanning forest. The graph is left unchanged """
+        return self.mst_with_weight(algorithm, workers)[0]
+
+    def _dijkstra(self, u: int, target=_MISSING):
+        """
+        Dijkstra from u over a binary heap with lazy deletion, stopping once target is settled.
+        :return: (dist, pred) where dist holds the final distance of every settled vertex
+        """
+        g = self.g
+        if u not in g:
+            raise Exception ("Vertex U doesn't Exists")
+        dist: Dict[int, int] = {}
+        best = {u: 0}  # tentative distances
+        pred: Dict[int, Optional[int]] = {u: None}
+        tie = count()  # orders equal distances, so vertex IDs are never compared
+        heap = [(0, next(tie), u)]
+        while heap:
+            d, _, x = heappop(heap)
+            if x in dist:
+                continue  # stale entry left behind by a later, shorter relaxation
+            dist[x] = d
+            if x == target:
+                break
+            for y, w in g[x].items():
+                nd = d + w
+                if y not in dist and nd < best.get(y, _INF):
+                    best[y] = nd
+                    pred[y] = x
+                    heappush(heap, (nd, next(tie), y))
+        return dist, pred
+
+    @staticmethod
+    def _path(pred: Dict[int, Optional[int]], v: int) -> List[int]:
+        """ Backtracks from v along pred to the source """
+        path = [v]
+        while pred[path[-1]] is not None:
+            path.append(pred[path[-1]])
+        return path[::-1]
+
+    def _bidirectional_path(self, u: int, v: int) -> Optional[List[int]]:
+        """
+        Dijkstra run from u and from v at once, always advancing the side with the closer frontier.
+        Stops once the two frontiers together are no shorter than the best u-v path seen
+        """
+        g = self.g
+        best = ({u: 0}, {v: 0})  # tentative distances from u / from v
+        pred: Tuple[Dict[int, Optional[int]], Dict[int, Optional[int]]] = ({u: None}, {v: None})
+        done = (set(), set())
+        tie = count()  # orders equal distances, so vertex IDs are never compared
+        heaps = ([(0, next(tie), u)], [(0, next(tie), v)])
+        mu = 0 if u == v else _INF  # length of the best path found so far
+        meet = u
+        while heaps[0] and heaps[1] and heaps[0][0][0] + heaps[1][0][0] < mu:
+            side = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+            d, _, x = heappop(heaps[side])
+            if x in done[side]:
                 continue
+            done[side].add(x)
+            mine, other = best[side], best[1 - side]
+            for y, w in g[x].items():
+                nd = d + w
+                if y not in done[side] and nd < mine.get(y, _INF):
+                    mine[y] = nd
+                    pred[side][y] = x
+                    heappush(heaps[side], (nd, next(tie), y))
+                    if y in other and nd + other[y] < mu:
+                        mu = nd + other[y]
+                        meet = y
+        if mu == _INF:
+            return None
+        path = self._path(pred[0], meet)
+        x = pred[1][meet]
+        while x is not None:
+            path.append(x)
+            x = pred[1][x]
+        return path
+
+    def _astar_path(self, u: int, v: int, heuristic: Callable[[int, int], float]) -> Optional[List[int]]:
+        """
+        A* search ordered by distance + heuristic(x, v).
+        Vertices are reopened when reached again more cheaply, so an admissible heuristic suffices
+        """
+        g = self.g
+        best = {u: 0}
+        pred: Dict[int, Optional[int]] = {u: None}
+        tie = count()  # orders equal estimates, so vertex IDs are never compared
+        heap = [(heuristic(u, v), 0, next(tie), u)]
+        while heap:
+            _, d, _, x = heappop(heap)
+            if d > best[x]:
+                continue  # stale entry
+            if x == v:
+                return self._path(pred, v)
+            for y, w in g[x].items():
+                nd = d + w
+                if nd < best.get(y, _INF):
+                    best[y] = nd
+                    pred[y] = x
+                    heappush(heap, (nd + heuristic(y, v), nd, next(tie), y))
+        return None
+
+    def shortest_path(self, u: int, v: int, method='dijkstra',
+                      heuristic: Optional[Callable[[int, int], float]] = None) -> List[int]:
+        """
+        :return: the vertices of a shortest path from u to v. :raise: an exception when v isn't reachable
+        :param method: 'dijkstra', 'bidirectional' (searches from both ends) or 'astar'
+        :param heuristic: for 'astar', heuristic(x, v) must never exceed the distance from x to v
+        """
+        if u not in self.g:
+            raise Exception ("Vertex U doesn't Exists")
+        if v not in self.g:
+            raise Exception ("Vertex V doesn't Exists")
+        # A stale index would need an O(V + E) rebuild, which costs more than the search it could skip
+        components = self.components
+        if components is not None and not components.stale and not components.connected(u, v):
+            raise Exception ("Vertex V isn't reachable from U")
+        cache = self.path_cache
+        if cache is not None:
+            path = cache.lookup(self.version, u, v)
+            if path is not _MISSING:
+                if path is None:
+                    raise Exception ("Vertex V isn't reachable from U")
+                return list(path)
+        if method == 'dijkstra':
+            dist, pred = self._dijkstra(u, v)
+            path = self._path(pred, v) if v in dist else None
+            if cache is not None:
+                cache.store_tree(self.version, u, dist, pred, v not in dist)
+        elif method == 'bidirectional':
+            path = self._bidirectional_path(u, v)
+        elif method == 'astar':
+            if heuristic is None:
+                raise Exception ("A* needs a heuristic")
+            path = self._astar_path(u, v, heuristic)
+        else:
+            raise Exception ("Unknown shortest path method")
+        if cache is not None:
+            cache.store_path(self.version, u, v, path)
+        if path is None:
+            raise Exception ("Vertex V isn't reachable from U")
+        return list(path) if cache is not None else path
+
+    def shortest_distances(self, u: int) -> Tuple[Dict[int, int], Dict[int, Optional[int]]]:
+        """
+        Single-source shortest paths from u in one pass.
+        :return: (distance, predecessor) maps over every vertex reachable from u; the predecessor of u is None
+        """
+        cache = self.path_cache
+        if cache is None:
+            return self._dijkstra(u)
+        tree = cache.lookup_tree(self.version, u)
+        if tree is None:
+            tree = self._dijkstra(u)
+            cache.store_tree(self.version, u, tree[0], tree[1], True)
+        return dict(tree[0]), dict(tree[1])
+
+    # Record layout of load_edges(format='binary'): u, v, w as native int64
+    EDGE_RECORD = struct.Struct('=qqq')
+
+    def load_edges(self, source, format='csv', chunk_size=65536) -> int:
+        """
+        Bulk-loads edges from an edge-list file or an iterable of (u, v, w), creating missing vertices.
+        :param format: for files, 'csv' or 'tsv' (one u, v, w row per line) or 'binary' (EDGE_RECORD records)
+        :return: the number of edges loaded.
+        Every chunk is validated before any of it is inserted; a failing chunk raises and leaves the
+        edges of earlier chunks loaded
+        """
+        if isinstance(source, (str, os.PathLike)):
+            if format == 'binary':
+                f = open(source, 'rb')
             else:
-                mst_list.append((each_edge[0],each_edge[1]))
-                d.union(find_a,find_b)
-           
-        return mst_list
-        ...
+                f = open(source, newline='')
+            with f:
+                return self._load_chunks(_edge_chunks(f, format, chunk_size))
+        return self._load_chunks(_chunked(source, chunk_size))
+
+    def _load_chunks(self, chunks: Iterable[List[Tuple[int, int, int]]]) -> int:
+        loaded = 0
+        for chunk in chunks:
+            self._insert_edge_chunk(chunk)
+            loaded += len(chunk)
+        return loaded
+
+    def _insert_edge_chunk(self, chunk: List[Tuple[int, int, int]]):
+        """ Validates a chunk as a whole, then inserts it with every adjacency table sized once """
+        if not chunk:
+            return
+        if min(w for _, _, w in chunk) < 0:
+            raise Exception ("Weight less than zero")
+        pairs = {_edge_key(u, v): (u, v) for u, v, _ in chunk}
+        if len(pairs) != len(chunk):
+            raise Exception ("Edge Already Exists")
+        g = self.g
+        for u, v in pairs.values():
+            temp = g.get(u)
+            if temp is not None and v in temp:
+                raise Exception ("Edge Already Exists")
+        # Group the new adjacency entries by vertex, so each table grows at most once
+        added: Dict[int, List[Tuple[int, int]]] = {}
+        for u, v, w in chunk:
+            added.setdefault(u, []).append((v, w))
+            if u != v:
+                added.setdefault(v, []).append((u, w))
+        new_vertices = [x for x in added if x not in g]
+        if new_vertices:
+            g.reserve(len(g) + len(new_vertices))
+            for x in new_vertices:
+                g[x] = self._new_adjacency()
+        for x, entries in added.items():
+            self._add_neighbors(x, g[x], entries)
+        self.version += 1
+        if self.maintained_mst is not None:
+            self.maintained_mst.stale = True
+        components = self.components
+        if components is not None and not components.stale:
+            for x in new_vertices:
+                components.add_vertex(x)
+            for u, v, _ in chunk:
+                components.insert(u, v)
+
+    def freeze(self) -> 'FrozenGraph':
+        """ Returns an immutable compressed-sparse-row copy of the graph for read-only algorithms """
+        vertex_ids = array('q', sorted(self.g))
+        index: HashTable[int, int] = HashTable(self.get_hash)
+        index.update_many((u, i) for i, u in enumerate(vertex_ids))
+        indptr = array('q', [0])
+        indices = array('q')
+        weights = []
+        for u in vertex_ids:
+            row = sorted((index[v], w) for v, w in self.g[u].items())
+            indices.extend(i for i, _ in row)
+            weights.extend(w for _, w in row)
+            indptr.append(len(indices))
+        return FrozenGraph(vertex_ids, indptr, indices, _weight_array(weights), index)
+
+    def batch_shortest_paths(self, sources: Iterable[int], targets: Optional[Iterable[int]] = None,
+                             workers: Optional[int] = None) -> Iterator[Tuple[int, Dict[int, int]]]:
+        """ Multi-source shortest distances over a process pool, see FrozenGraph.batch_shortest_paths """
+        return self.freeze().batch_shortest_paths(sources, targets, workers)
+
+    def save(self, path: str):
+        """ Writes the graph in the FrozenGraph binary layout """
+        self.freeze().save(path)
+
+    @staticmethod
+    def load(path: str, mmap=True) -> 'FrozenGraph':
+        """ Opens a file written by save() as a read-only FrozenGraph, see FrozenGraph.load """
+        return FrozenGraph.load(path, mmap)
+
+
+def _parse_weight(text: str):
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def _chunked(items: Iterable, size: int) -> Iterator[list]:
+    """ Splits an iterable into lists of at most size items """
+    it = iter(items)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _edge_chunks(f, format: str, chunk_size: int) -> Iterator[List[Tuple[int, int, int]]]:
+    """ Streams (u, v, w) chunks from an open edge-list file """
+    if format == 'binary':
+        record = Graph.EDGE_RECORD.size
+        while True:
+            data = f.read(record * chunk_size)
+            if not data:
+                return
+            if len(data) % record:
+                raise Exception ("Truncated edge record")
+            flat = array('q')
+            flat.frombytes(data)
+            yield list(zip(flat[0::3], flat[1::3], flat[2::3]))
+    elif format in ('csv', 'tsv'):
+        rows = csv.reader(f, delimiter=',' if format == 'csv' else '\t')
+        for chunk in _chunked((row for row in rows if row and not row[0].startswith('#')), chunk_size):
+            yield [(int(u), int(v), _parse_weight(w)) for u, v, w in chunk]
+    else:
+        raise Exception ("Unknown edge file format")
+
+
+def euclidean_heuristic(coordinates) -> Callable[[int, int], float]:
+    """
+    A* heuristic from vertex coordinates (a mapping from vertex to an (x, y) tuple).
+    Admissible when no edge weighs less than the straight-line distance between its ends
+    """
+    def heuristic(x: int, v: int) -> float:
+        (x1, y1), (x2, y2) = coordinates[x], coordinates[v]
+        return math.hypot(x1 - x2, y1 - y2)
+    return heuristic
+
+
+def _weight_array(weights: Iterable) -> array:
+    """ Packs weights as int64, or as doubles when some weight isn't an int """
+    weights = list(weights)
+    try:
+        return array('q', weights)
+    except TypeError:
+        return array('d', weights)
+
+
+# What a worker process of batch_shortest_paths / boruvka_mst reads from shared memory
+_shared_graph: Optional['FrozenGraph'] = None
+_shared_labels = None  # component of every vertex during a Boruvka round
+_shared_blocks: list = []
+
+
+def _attach_shared_graph(name: str, labels_name: Optional[str] = None):
+    """ Worker initializer: maps the graph (and Boruvka component labels) put in shared memory """
+    global _shared_graph, _shared_labels, _shared_blocks
+    block = shared_memory.SharedMemory(name=name)
+    _shared_blocks = [block]
+    _shared_graph = FrozenGraph.from_buffer(block.buf)
+    if labels_name is not None:
+        labels = shared_memory.SharedMemory(name=labels_name)
+        _shared_blocks.append(labels)
+        _shared_labels = labels.buf.cast('q')
+
+
+def _shared_graph_distances(sources: List[int], targets: Optional[List[int]]) -> List[Tuple[int, Dict[int, int]]]:
+    return [(u, _shared_graph._distances_from(u, targets)) for u in sources]
+
+
+def _shared_graph_min_edges(lo: int, hi: int) -> Dict[int, Tuple[int, int, int]]:
+    return _shared_graph._min_outgoing_edges(_shared_labels, lo, hi)
+
+
+class FrozenGraph:
+    """
+    An immutable compressed-sparse-row (CSR) view of a Graph.
+    Vertex i (in ascending order of vertex ID) has the neighbours indices[indptr[i]:indptr[i + 1]],
+    sorted, with the edge weights at the same positions of weights
+    """
+
+    # Binary layout, shared by process pools and files:
+    #   magic, version, vertex count n, stored edge count m (each edge twice), weight typecode, padding
+    #   vertex_ids[n], indptr[n + 1], indices[m] (int64), weights[m] (int64 or double)
+    _MAGIC = b'GRAPHCSR'
+    _VERSION = 1
+    _HEADER = struct.Struct('=8sqqqc7x')
+
+    def __init__(self, vertex_ids, indptr, indices, weights, index: Optional[HashTable[int, int]] = None):
+        self.vertex_ids = vertex_ids  # dense index -> vertex ID, ascending
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        # 'q' or 'd'. Weights read by from_buffer are memoryviews, which name their type in format
+        self.typecode = weights.typecode if isinstance(weights, array) else weights.format
+        self.index = index  # vertex ID -> dense index. Without it, vertex_ids is binary searched
+
+    def _find(self, u: int) -> Optional[int]:
+        """ Returns the dense index of u, or None when u isn't a vertex """
+        if self.index is not None:
+            return self.index.get(u)
+        ids = self.vertex_ids
+        i = bisect_left(ids, u)
+        return i if i < len(ids) and ids[i] == u else None
+
+    def index_of(self, u: int) -> int:
+        i = self._find(u)
+        if i is None:
+            raise Exception ("Vertex doesn't Exists")
+        return i
+
+    def nbytes(self) -> int:
+        """ Size of the binary layout written by write_into() """
+        return (self._HEADER.size + 8 * (2 * len(self.vertex_ids) + 1)
+                + (8 + self.weights.itemsize) * len(self.indices))
+
+    def write_into(self, buf, offset=0):
+        """ Writes the binary layout into a writable buffer of at least nbytes() bytes """
+        header = self._HEADER.pack(self._MAGIC, self._VERSION, len(self.vertex_ids), len(self.indices),
+                                   self.typecode.encode())
+        view = memoryview(buf)
+        view[offset:offset + len(header)] = header
+        offset += len(header)
+        for a in (self.vertex_ids, self.indptr, self.indices, self.weights):
+            data = memoryview(a).cast('B')
+            view[offset:offset + len(data)] = data
+            offset += len(data)
+
+    @classmethod
+    def from_buffer(cls, buf, offset=0) -> 'FrozenGraph':
+        """ Wraps a buffer holding the binary layout without copying it """
+        view = memoryview(buf).cast('B')
+        if len(view) - offset < cls._HEADER.size:
+            raise Exception ("Truncated frozen graph")
+        magic, version, n, m, typecode = cls._HEADER.unpack_from(view, offset)
+        if magic != cls._MAGIC:
+            raise Exception ("Not a frozen graph")
+        if version != cls._VERSION:
+            raise Exception ("Unsupported frozen graph version")
+        if len(view) - offset < cls._HEADER.size + 8 * (2 * n + 1 + 2 * m):
+            raise Exception ("Truncated frozen graph")
+        offset += cls._HEADER.size
+        arrays = []
+        for code, count in (('q', n), ('q', n + 1), ('q', m), (typecode.decode(), m)):
+            arrays.append(view[offset:offset + 8 * count].cast(code))
+            offset += 8 * count
+        return cls(*arrays)
+
+    def save(self, path: str):
+        """ Writes the binary layout to a file, one array at a time """
+        with open(path, 'wb') as f:
+            f.write(self._HEADER.pack(self._MAGIC, self._VERSION, len(self.vertex_ids), len(self.indices),
+                                      self.typecode.encode()))
+            for a in (self.vertex_ids, self.indptr, self.indices, self.weights):
+                f.write(memoryview(a).cast('B'))
+
+    @classmethod
+    def load(cls, path: str, mmap=True) -> 'FrozenGraph':
+        """
+        Reads a file written by save(). With mmap, the arrays are views of a read-only mapping of the file:
+        loading is O(1), pages are read on first touch and shared by every process mapping the file
+        """
+        if mmap:
+            return cls.from_buffer(_map_file(path))
+        with open(path, 'rb') as f:
+            return cls.from_buffer(f.read())
+
+    def vertex_count(self) -> int:
+        return len(self.vertex_ids)
+
+    def edge_count(self) -> int:
+        return len(self.indices) // 2
+
+    def degree(self, u: int) -> int:
+        i = self.index_of(u)
+        return self.indptr[i + 1] - self.indptr[i]
+
+    def neighbors(self, u: int) -> list:
+        i = self.index_of(u)
+        ids = self.vertex_ids
+        return [ids[j] for j in self.indices[self.indptr[i]:self.indptr[i + 1]]]
+
+    def has_edge(self, u: int, v: int) -> bool:
+        i = self.index_of(u)
+        j = self._find(v)
+        if j is None:
+            return False
+        lo, hi = self.indptr[i], self.indptr[i + 1]
+        k = bisect_left(self.indices, j, lo, hi)
+        return k < hi and self.indices[k] == j
+
+    def bfs(self, u: int) -> List[int]:
+        """ Returns the vertices reachable from u in breadth-first order """
+        indptr, indices = self.indptr, self.indices
+        s = self.index_of(u)
+        seen = bytearray(len(self.vertex_ids))
+        seen[s] = 1
+        order = [s]
+        queue = deque(order)
+        while queue:
+            x = queue.popleft()
+            for y in indices[indptr[x]:indptr[x + 1]]:
+                if not seen[y]:
+                    seen[y] = 1
+                    order.append(y)
+                    queue.append(y)
+        ids = self.vertex_ids
+        return [ids[i] for i in order]
+
+    def _dijkstra(self, s: int, t=-1, targets: Optional[bytearray] = None):
+        """
+        Dijkstra from dense index s, stopping once t is settled, or once every index flagged in targets is.
+        :return: (dist, pred) lists
+        """
+        indptr, indices, weights = self.indptr, self.indices, self.weights
+        n = len(self.vertex_ids)
+        remaining = targets.count(1) if targets is not None else -1
+        dist: List[Optional[int]] = [None] * n
+        pred = [-1] * n
+        settled = bytearray(n)
+        dist[s] = 0
+        heap = [(0, s)]
+        while heap:
+            d, x = heappop(heap)
+            if settled[x]:
+                continue  # stale entry left behind by a later, shorter relaxation
+            settled[x] = 1
+            if x == t:
+                break
+            if targets is not None and targets[x]:
+                remaining -= 1
+                if remaining == 0:
+                    break
+            for k in range(indptr[x], indptr[x + 1]):
+                y = indices[k]
+                nd = d + weights[k]
+                if not settled[y] and (dist[y] is None or nd < dist[y]):
+                    dist[y] = nd
+                    pred[y] = x
+                    heappush(heap, (nd, y))
+        return dist, pred
 
     def shortest_path(self, u: int, v: int) -> List[int]:
-        
-#        visited for explored vertex and unvisited for not yet explored vertex
-        visited=set()
-        unvisited=[]
-        
-#        initialize distnaces of all to some max value
-        shortest_distance_list=[9999999] * (len(self.g.keys()))
+        s, t = self.index_of(u), self.index_of(v)
+        dist, pred = self._dijkstra(s, t)
+        if dist[t] is None:
+            raise Exception ("Vertex V isn't reachable from U")
+        path = [t]
+        while path[-1] != s:
+            path.append(pred[path[-1]])
+        ids = self.vertex_ids
+        return [ids[i] for i in reversed(path)]
 
-#        this list is to get parent of vertices
-        parent=self.g.keys()
-#        print(parent)
-        
-#        to maintain mapping of all the vertices
-        all_keys_mapping=self.g.keys()
-#        print(all_keys_mapping)
-        
-#        set start vertex distance to zero
-        shortest_distance_list[parent.index(u)]=0
-        
-        unvisited.append(u)
-        while(len(unvisited)!=0):#explore all vertices
-            current_vertex=unvisited.pop(0)
-            temp=self.g.__getitem__(current_vertex)
-            
-            visited.add(current_vertex)
-
-            for neigh in temp.keys():#iterate over all neighbours of current vertex
-                w = temp.__getitem__(neigh)
-#                This is Relaxation step given in lectures
-                if (shortest_distance_list[all_keys_mapping.index(neigh)] > w + shortest_distance_list[all_keys_mapping.index(current_vertex)]):
-                    shortest_distance_list[all_keys_mapping.index(neigh)] = w + shortest_distance_list[all_keys_mapping.index(current_vertex)]
-                    unvisited.append(neigh)
-                    parent[all_keys_mapping.index(neigh)]=current_vertex
-                    visited.add(neigh)
-        
-        print("Shortest distance from", u, "to",v, "is:", shortest_distance_list[all_keys_mapping.index(v)])
+    def shortest_distances(self, u: int) -> Tuple[Dict[int, int], Dict[int, Optional[int]]]:
+        """ :return: (distance, predecessor) maps over every vertex reachable from u, like Graph.shortest_distances """
+        dist, pred = self._dijkstra(self.index_of(u))
+        ids = self.vertex_ids
+        return ({ids[i]: d for i, d in enumerate(dist) if d is not None},
+                {ids[i]: (ids[p] if p >= 0 else None) for i, p in enumerate(pred) if dist[i] is not None})
+
+    def _distances_from(self, u: int, targets: Optional[List[int]]) -> Dict[int, int]:
+        """ Distances from u to the reachable targets (every vertex when targets is None) """
+        ids = self.vertex_ids
+        if targets is None:
+            dist, _ = self._dijkstra(self.index_of(u))
+            return {ids[i]: d for i, d in enumerate(dist) if d is not None}
+        mask = bytearray(len(ids))
+        for v in targets:
+            mask[self.index_of(v)] = 1
+        dist, _ = self._dijkstra(self.index_of(u), targets=mask)
+        return {v: dist[self.index_of(v)] for v in targets if dist[self.index_of(v)] is not None}
+
+    def batch_shortest_paths(self, sources: Iterable[int], targets: Optional[Iterable[int]] = None,
+                             workers: Optional[int] = None) -> Iterator[Tuple[int, Dict[int, int]]]:
+        """
+        Shortest distances from many sources, yielding (source, {target: distance}) as results complete.
+        Unreachable targets are left out; with targets None every reachable vertex is reported.
+        The graph is copied once into shared memory and the sources are spread over a pool of worker processes
+        """
+        sources = list(sources)
+        targets = list(targets) if targets is not None else None
+        workers = workers or os.cpu_count() or 1
+        if workers <= 1 or len(sources) <= 1:
+            for u in sources:
+                yield u, self._distances_from(u, targets)
+            return
+        shm = shared_memory.SharedMemory(create=True, size=self.nbytes())
+        try:
+            self.write_into(shm.buf)
+            chunk = max(1, len(sources) // (workers * 4))
+            with ProcessPoolExecutor(workers, initializer=_attach_shared_graph, initargs=(shm.name,)) as pool:
+                futures = [pool.submit(_shared_graph_distances, sources[i:i + chunk], targets)
+                           for i in range(0, len(sources), chunk)]
+                for future in as_completed(futures):
+                    yield from future.result()
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def _min_outgoing_edges(self, labels, lo: int, hi: int) -> Dict[int, Tuple[int, int, int]]:
+        """
+        For the vertices lo..hi-1, the cheapest edge leaving each component.
+        :return: component -> (weight, smaller end, larger end); ties are broken by the ends so all workers agree
+        """
+        indptr, indices, weights = self.indptr, self.indices, self.weights
+        best: Dict[int, Tuple[int, int, int]] = {}
+        for i in range(lo, hi):
+            c = labels[i]
+            for k in range(indptr[i], indptr[i + 1]):
+                j = indices[k]
+                if labels[j] != c:
+                    edge = (weights[k], i, j) if i < j else (weights[k], j, i)
+                    current = best.get(c)
+                    if current is None or edge < current:
+                        best[c] = edge
+        return best
+
+    def boruvka_mst(self, workers: Optional[int] = None) -> Tuple[List[Tuple[int, int]], int]:
+        """
+        Boruvka's minimum spanning forest: every round adds the cheapest edge leaving each component,
+        which at least halves the number of components. With several workers each round scans the
+        shared CSR arrays in parallel, one vertex range per task. :return: (edges, total weight)
+        """
+        n = len(self.vertex_ids)
+        workers = workers or os.cpu_count() or 1
+        d = DenseDisjointSetUnion(n)
+        tree: List[Tuple[int, int, int]] = []
+        if workers <= 1 or n < 2:
+            labels = array('q', range(n))
+            scan = lambda ranges: [self._min_outgoing_edges(labels, lo, hi) for lo, hi in ranges]
+            tree = self._boruvka_rounds(d, labels, [(0, n)], scan)
+        else:
+            graph_block = shared_memory.SharedMemory(create=True, size=self.nbytes())
+            labels_block = shared_memory.SharedMemory(create=True, size=8 * n)
+            labels = labels_block.buf.cast('q')
+            try:
+                self.write_into(graph_block.buf)
+                labels[:] = array('q', range(n))
+                step = -(-n // (workers * 4))
+                ranges = [(lo, min(n, lo + step)) for lo in range(0, n, step)]
+                with ProcessPoolExecutor(workers, initializer=_attach_shared_graph,
+                                         initargs=(graph_block.name, labels_block.name)) as pool:
+                    scan = lambda ranges: list(pool.map(_shared_graph_min_edges, *zip(*ranges)))
+                    tree = self._boruvka_rounds(d, labels, ranges, scan)
+            finally:
+                labels.release()
+                for block in (graph_block, labels_block):
+                    block.close()
+                    block.unlink()
+        ids = self.vertex_ids
+        return [(ids[i], ids[j]) for _, i, j in tree], sum(w for w, _, _ in tree)
+
+    @staticmethod
+    def _boruvka_rounds(d: DenseDisjointSetUnion, labels, ranges, scan) -> List[Tuple[int, int, int]]:
+        """ Runs Boruvka rounds until no component has an outgoing edge. scan maps vertex ranges to results """
+        tree = []
+        while True:
+            best: Dict[int, Tuple[int, int, int]] = {}
+            for part in scan(ranges):
+                for c, edge in part.items():
+                    if c not in best or edge < best[c]:
+                        best[c] = edge
+            if not best:
+                return tree
+            for edge in sorted(best.values()):
+                if d.union(edge[1], edge[2]):  # two components may pick the same edge
+                    tree.append(edge)
+            labels[:] = array('q', d.find_many(range(len(labels))))
+
+    def mst(self) -> List[Tuple[int, int]]:
+        """ Kruskal over the CSR edge arrays. Returns the edges of a minimum spanning forest """
+        indptr, indices, weights = self.indptr, self.indices, self.weights
+        edges = []
+        for i in range(len(self.vertex_ids)):
+            for k in range(indptr[i], indptr[i + 1]):
+                if i < indices[k]:  # every edge is stored in both rows, keep one copy
+                    edges.append((weights[k], i, indices[k]))
+        edges.sort()
+        d = DenseDisjointSetUnion(len(self.vertex_ids))
+        merged = d.union_many([e[1] for e in edges], [e[2] for e in edges])
+        ids = self.vertex_ids
+        return [(ids[e[1]], ids[e[2]]) for e, m in zip(edges, merged) if m]
+
+
+class ContractionHierarchy:
+    """
+    Contraction hierarchy over a Graph for repeated shortest-path queries on a graph that rarely changes.
+    Vertices are contracted one at a time, cheapest first; contracting v adds a shortcut a-b between two
+    remaining neighbours whenever a-v-b may be the only shortest a-b path. Every edge and shortcut then
+    points "up" from its earlier-contracted end, and a query is a Dijkstra from both ends that only goes up
+    """
+
+    _MAGIC = b'CHIER001'
+    _HEADER = struct.Struct('=8sqqc7x')
+
+    # Settled vertices after which a witness search gives up and keeps the shortcut
+    witness_settle_limit = 200
+
+    def __init__(self, vertex_ids, indptr, indices, weights, middle):
+        self.vertex_ids = vertex_ids  # dense index -> vertex ID
+        # Upward graph in CSR form; middle is the contracted vertex a shortcut bypasses, -1 for original edges
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self.middle = middle
+        self.index: HashTable[int, int] = HashTable(splitmix64_hash)  # vertex ID -> dense index
+        self.index.update_many((u, i) for i, u in enumerate(vertex_ids))
+
+    @classmethod
+    def build(cls, graph: 'Graph') -> 'ContractionHierarchy':
+        """ Contracts every vertex of the graph. Takes a while, queries are fast afterwards """
+        frozen = graph.freeze()
+        n = frozen.vertex_count()
+        # Remaining graph: for every uncontracted vertex, neighbour -> (weight, middle)
+        adj: List[Dict[int, Tuple[int, int]]] = [{} for _ in range(n)]
+        for i in range(n):
+            for k in range(frozen.indptr[i], frozen.indptr[i + 1]):
+                if frozen.indices[k] != i:  # a self-loop is never on a shortest path
+                    adj[i][frozen.indices[k]] = (frozen.weights[k], -1)
+        up: List[List[Tuple[int, int, int]]] = [[] for _ in range(n)]
+        contracted_neighbours = [0] * n
+
+        def shortcuts(v: int) -> List[Tuple[int, int, int]]:
+            """ The (a, b, weight) shortcuts that contracting v needs """
+            needed = []
+            neighbours = list(adj[v].items())
+            for i, (a, (wa, _)) in enumerate(neighbours):
+                targets = [(b, wa + wb) for b, (wb, _) in neighbours[i + 1:]]
+                if not targets:
+                    continue
+                dist = cls._witness_search(adj, a, v, max(w for _, w in targets), cls.witness_settle_limit)
+                needed.extend((a, b, w) for b, w in targets if dist.get(b, _INF) > w)
+            return needed
+
+        def priority(v: int, needed: List[Tuple[int, int, int]]) -> int:
+            """ Edge difference plus contracted neighbours, which keeps the hierarchy shallow and spread out """
+            return len(needed) - len(adj[v]) + contracted_neighbours[v]
+
+        heap = [(priority(v, shortcuts(v)), v) for v in range(n)]
+        heapify(heap)
+        while heap:
+            _, v = heappop(heap)
+            needed = shortcuts(v)
+            p = priority(v, needed)
+            if heap and p > heap[0][0]:
+                heappush(heap, (p, v))  # lazy update: v got more expensive since it was queued
+                continue
+            for a, b, w in needed:
+                current = adj[a].get(b)
+                if current is None or w < current[0]:
+                    adj[a][b] = adj[b][a] = (w, v)
+            for x, (w, m) in adj[v].items():
+                up[v].append((x, w, m))
+                del adj[x][v]
+                contracted_neighbours[x] += 1
+            adj[v] = {}
+
+        indptr = array('q', [0])
+        indices = array('q')
+        weights = []
+        middle = array('q')
+        for row in up:
+            row.sort()
+            indices.extend(x for x, _, _ in row)
+            weights.extend(w for _, w, _ in row)
+            middle.extend(m for _, _, m in row)
+            indptr.append(len(indices))
+        return cls(frozen.vertex_ids, indptr, indices, _weight_array(weights), middle)
+
+    @staticmethod
+    def _witness_search(adj, a: int, skip: int, limit, settle_limit: int) -> Dict[int, int]:
+        """ Bounded Dijkstra from a that avoids skip. :return: lengths of paths found, up to limit """
+        dist = {a: 0}
+        done = set()
+        heap = [(0, a)]
+        while heap and len(done) < settle_limit:
+            d, x = heappop(heap)
+            if x in done:
+                continue
+            done.add(x)
+            for y, (w, _) in adj[x].items():
+                nd = d + w
+                if y != skip and nd <= limit and nd < dist.get(y, _INF):
+                    dist[y] = nd
+                    heappush(heap, (nd, y))
+        return dist
+
+    def _search(self, s: int, t: int):
+        """
+        Upward Dijkstra from s and from t.
+        :return: (distance, meeting vertex, predecessor maps) with distance None when t isn't reachable
+        """
+        indptr, indices, weights = self.indptr, self.indices, self.weights
+        best = ({s: 0}, {t: 0})
+        pred: Tuple[Dict[int, Tuple[int, int]], Dict[int, Tuple[int, int]]] = ({}, {})  # vertex -> (lower vertex, edge)
+        done = (set(), set())
+        heaps = ([(0, s)], [(0, t)])
+        mu = 0 if s == t else _INF
+        meet = s
+        while True:
+            # Each side may stop once its frontier is no closer than the best meeting found
+            live = [side for side in (0, 1) if heaps[side] and heaps[side][0][0] < mu]
+            if not live:
+                break
+            side = min(live, key=lambda side: heaps[side][0][0])
+            d, x = heappop(heaps[side])
+            if x in done[side]:
+                continue
+            done[side].add(x)
+            other = best[1 - side].get(x)
+            if other is not None and d + other < mu:
+                mu = d + other
+                meet = x
+            mine = best[side]
+            for k in range(indptr[x], indptr[x + 1]):
+                y = indices[k]
+                nd = d + weights[k]
+                if nd < mine.get(y, _INF):
+                    mine[y] = nd
+                    pred[side][y] = (x, k)
+                    heappush(heaps[side], (nd, y))
+        return (None if mu == _INF else mu), meet, pred
+
+    def _edge(self, x: int, y: int) -> int:
+        """ :return: the position of the upward edge x-y, stored in the row of x """
+        lo, hi = self.indptr[x], self.indptr[x + 1]
+        return bisect_left(self.indices, y, lo, hi)
+
+    def _unpack(self, a: int, b: int, m: int, out: List[int]):
+        """ Appends the original vertices after a on the edge or shortcut a-b with middle m """
+        stack = [(a, b, m)]
+        while stack:
+            a, b, m = stack.pop()
+            if m < 0:
+                out.append(b)
+                continue
+            # Edges a-m and m-b were both upward edges of m when m was contracted
+            stack.append((m, b, self.middle[self._edge(m, b)]))
+            stack.append((a, m, self.middle[self._edge(m, a)]))
+
+    def distance(self, u: int, v: int) -> Optional[int]:
+        """ :return: the length of a shortest path from u to v, or None when v isn't reachable """
+        return self._search(self._index_of(u), self._index_of(v))[0]
+
+    def shortest_path(self, u: int, v: int) -> List[int]:
+        """ :return: the vertices of a shortest path from u to v, like Graph.shortest_path """
+        s, t = self._index_of(u), self._index_of(v)
+        dist, meet, pred = self._search(s, t)
+        if dist is None:
+            raise Exception ("Vertex V isn't reachable from U")
+        climb = []  # upward edges from s to the meeting vertex, collected backwards
+        x = meet
+        while x != s:
+            lower, k = pred[0][x]
+            climb.append((lower, x, k))
+            x = lower
+        path = [s]
+        for lower, x, k in reversed(climb):
+            self._unpack(lower, x, self.middle[k], path)
+        x = meet
+        while x != t:
+            lower, k = pred[1][x]
+            self._unpack(x, lower, self.middle[k], path)
+            x = lower
+        ids = self.vertex_ids
+        return [ids[i] for i in path]
+
+    def _index_of(self, u: int) -> int:
+        i = self.index.get(u)
+        if i is None:
+            raise Exception ("Vertex doesn't Exists")
+        return i
+
+    def save(self, path: str):
+        """ Writes the hierarchy: header, vertex IDs, then the upward CSR arrays """
+        n, m = len(self.vertex_ids), len(self.indices)
+        with open(path, 'wb') as f:
+            f.write(self._HEADER.pack(self._MAGIC, n, m, self.weights.typecode.encode()))
+            for a in (self.vertex_ids, self.indptr, self.indices, self.weights, self.middle):
+                a.tofile(f)
+
+    @classmethod
+    def load(cls, path: str) -> 'ContractionHierarchy':
+        """ Reads a hierarchy written by save() """
+        with open(path, 'rb') as f:
+            magic, n, m, typecode = cls._HEADER.unpack(f.read(cls._HEADER.size))
+            if magic != cls._MAGIC:
+                raise Exception ("Not a contraction hierarchy file")
+            arrays = []
+            for code, count in (('q', n), ('q', n + 1), ('q', m), (typecode.decode(), m), ('q', m)):
+                a = array(code)
+                a.fromfile(f, count)
+                arrays.append(a)
+        return cls(*arrays)
 
-#        Backtracking from target to source to get shortest path
-        temp=v
-        shortest_path_list=[v]
-        while(temp!=u):
-            
-            temp=parent[all_keys_mapping.index(temp)]
-            shortest_path_list.append(temp)
-        
-        return shortest_path_list[::-1]
 
 class Test(unittest.TestCase):
-    ...
+    @staticmethod
+    def _random_graph(rng: random.Random, n: int, m: int, **kwargs) -> Tuple['Graph', Dict[int, Dict[int, int]]]:
+        """ A graph with n vertices and about m random edges (self-loops included), plus a dict copy of it """
+        graph = Graph(**kwargs)
+        adjacency: Dict[int, Dict[int, int]] = {u: {} for u in range(n)}
+        for u in range(n):
+            graph.create_vertex(u)
+        for _ in range(m):
+            u, v = rng.randrange(n), rng.randrange(n)
+            if v not in adjacency[u]:
+                w = rng.randint(1, 20)
+                graph.create_edge(u, v, w)
+                adjacency[u][v] = adjacency[v][u] = w
+        return graph, adjacency
+
+    @staticmethod
+    def _reference_distances(adjacency: Dict[int, Dict[int, int]], u: int) -> Dict[int, int]:
+        dist = {u: 0}
+        heap = [(0, u)]
+        while heap:
+            d, x = heappop(heap)
+            if d > dist[x]:
+                continue
+            for y, w in adjacency[x].items():
+                if d + w < dist.get(y, _INF):
+                    dist[y] = d + w
+                    heappush(heap, (d + w, y))
+        return dist
+
+    @staticmethod
+    def _reference_mst_weight(adjacency: Dict[int, Dict[int, int]]) -> int:
+        parent = {u: u for u in adjacency}
+
+        def find(x):
+            while parent[x] != x:
+                x = parent[x]
+            return x
+        total = 0
+        for w, u, v in sorted((w, u, v) for u in adjacency for v, w in adjacency[u].items() if u < v):
+            if find(u) != find(v):
+                parent[find(u)] = find(v)
+                total += w
+        return total
+
+    def test_incremental_resize_matches_dict(self):
+        rng = random.Random(3)
+        table = HashTable(lambda u: u * 2654435761, incremental=True)
+        reference = {}
+        for _ in range(20000):
+            key = rng.randrange(3000)
+            if rng.random() < 0.7:
+                table[key] = key * 2
+                reference[key] = key * 2
+            elif key in reference:
+                table.delete(key)
+                del reference[key]
+            self.assertEqual(table[key], reference.get(key))
+        self.assertEqual({key: table[key] for key in table.keys()}, reference)
+        self.assertEqual(table.size(), len(reference))
+
+    def test_incremental_resize_allocates_buckets_lazily(self):
+        table = HashTable(lambda u: u, incremental=True)
+        for i in range(33):
+            table[i] = i
+        self.assertIsNotNone(table._old_elements)  # a resize is still migrating
+        self.assertIn(None, table.elements)
+        self.assertEqual(sorted(table.keys()), list(range(33)))
+
+    def test_reads_during_iteration_see_every_key_once(self):
+        table = HashTable(lambda u: u, incremental=True)
+        for i in range(9):
+            table[i] = i
+        self.assertIsNotNone(table._old_elements)
+        self.assertEqual(sorted(k for k in table.keys() if table.get(k) is not None), list(range(9)))
+
+    def test_concurrent_table_under_threads(self):
+        for table_cls in (HashTable, OpenAddressingHashTable):
+            table = ConcurrentHashTable(splitmix64_hash, segments=4, table_cls=table_cls)
+            seen: List[Dict[int, object]] = [{} for _ in range(8)]
+
+            def work(i: int):
+                for k in range(600):
+                    seen[i][k % 300] = table.get_or_insert(k % 300, object)
+                table.update_many((1000 * (i + 1) + k, i) for k in range(200))
+
+            threads = [threading.Thread(target=work, args=(i,)) for i in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            expected = set(range(300)) | {1000 * (i + 1) + k for i in range(8) for k in range(200)}
+            self.assertEqual(set(table.keys()), expected)
+            self.assertEqual(len(table), len(expected))
+            for k in range(300):  # every thread got the single value that won the race
+                self.assertEqual({id(s[k]) for s in seen}, {id(table[k])})
+            self.assertEqual(table[1000 * 8 + 5], 7)
+
+    def test_snapshot_round_trip(self):
+        graph, adjacency = self._random_graph(random.Random(7), 40, 160)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'graph.snap')
+            graph.g.save(path)
+            mapped = open_mmap(path)
+            self.assertEqual(len(mapped), len(adjacency))
+            self.assertEqual(sorted(mapped), sorted(adjacency))
+            for u, neighbours in adjacency.items():
+                self.assertEqual(dict(mapped[u].items()), neighbours)
+                for v in range(40):
+                    self.assertEqual(v in mapped[u], v in neighbours)
+            self.assertIsNone(mapped[1000])
+            with self.assertRaises(Exception):
+                mapped[0] = 1
+
+    def test_contraction_hierarchy_matches_dijkstra(self):
+        rng = random.Random(15)
+        graph, adjacency = self._random_graph(rng, 60, 150)
+        hierarchy = ContractionHierarchy.build(graph)
+        for u in range(0, 60, 7):
+            expected = self._reference_distances(adjacency, u)
+            for v in range(60):
+                self.assertEqual(hierarchy.distance(u, v), expected.get(v))
+                if v in expected:
+                    path = hierarchy.shortest_path(u, v)
+                    self.assertEqual((path[0], path[-1]), (u, v))
+                    self.assertEqual(sum(adjacency[x][y] for x, y in zip(path, path[1:])), expected[v])
+
+    def test_contraction_hierarchy_ignores_self_loops(self):
+        graph = Graph()
+        for u in range(3):
+            graph.create_vertex(u)
+        graph.create_edge(0, 0, 3)
+        graph.create_edge(0, 1, 1)
+        graph.create_edge(1, 2, 1)
+        self.assertEqual(ContractionHierarchy.build(graph).shortest_path(0, 2), [0, 1, 2])
+
+    def test_batch_shortest_paths_over_a_process_pool(self):
+        graph, adjacency = self._random_graph(random.Random(16), 50, 70)
+        sources = [0, 3, 17, 42]
+        results = dict(graph.batch_shortest_paths(sources, workers=2))
+        self.assertEqual(sorted(results), sources)
+        for u in sources:
+            self.assertEqual(results[u], self._reference_distances(adjacency, u))
+        targets = [1, 2, 30]
+        for u, dist in graph.batch_shortest_paths(sources, targets, workers=2):
+            expected = self._reference_distances(adjacency, u)
+            self.assertEqual(dist, {v: expected[v] for v in targets if v in expected})
+
+    def test_parallel_boruvka_matches_kruskal(self):
+        for n, m in ((60, 200), (60, 40)):  # connected, then a forest
+            graph, adjacency = self._random_graph(random.Random(19), n, m)
+            expected = self._reference_mst_weight(adjacency)
+            edges, total = graph.mst_with_weight('boruvka', workers=2)
+            self.assertEqual(total, expected)
+            self.assertEqual(sum(adjacency[u][v] for u, v in edges), expected)
+            self.assertEqual(graph.freeze().boruvka_mst(workers=2)[1], expected)
+
+    def test_link_cut_tree(self):
+        tree = LinkCutTree()
+        nodes = [tree.add_node(value) for value in (5, 1, 9, 3)]
+        tree.link(nodes[0], nodes[1])
+        tree.link(nodes[1], nodes[2])
+        self.assertTrue(tree.connected(nodes[0], nodes[2]))
+        self.assertFalse(tree.connected(nodes[0], nodes[3]))
+        self.assertEqual(tree.path_max(nodes[0], nodes[1]), nodes[0])
+        self.assertEqual(tree.path_max(nodes[0], nodes[2]), nodes[2])
+        tree.cut(nodes[1], nodes[2])
+        self.assertFalse(tree.connected(nodes[0], nodes[2]))
+        tree.link(nodes[2], nodes[3])
+        self.assertEqual(tree.path_max(nodes[3], nodes[2]), nodes[2])
+
+    def test_maintained_mst_matches_kruskal(self):
+        rng = random.Random(20)
+        graph, adjacency = self._random_graph(rng, 40, 30)
+        maintained = graph.maintain_mst()
+        for _ in range(300):
+            u, v = rng.randrange(40), rng.randrange(40)
+            if v in adjacency[u] and rng.random() < 0.2:
+                graph.delete_edge(u, v)
+                del adjacency[u][v]
+                adjacency[v].pop(u, None)
+            elif v not in adjacency[u]:
+                w = rng.randint(1, 20)
+                graph.create_edge(u, v, w)
+                adjacency[u][v] = adjacency[v][u] = w
+            edges, total = graph.mst_with_weight()
+            self.assertEqual(total, self._reference_mst_weight(adjacency))
+            self.assertEqual(sum(adjacency[x][y] for x, y in edges), total)
+        self.assertIs(graph.maintained_mst, maintained)
+
+    def test_compact_adjacency_matches_tables(self):
+        compact, adjacency = self._random_graph(random.Random(22), 50, 200, compact_threshold=8)
+        tables, _ = self._random_graph(random.Random(22), 50, 200, compact_threshold=0)
+        self.assertTrue(any(isinstance(compact.g[u], SmallAdjacency) for u in adjacency))
+        self.assertTrue(any(not isinstance(compact.g[u], SmallAdjacency) for u in adjacency))
+        for u in adjacency:
+            self.assertEqual(sorted(compact.neighbors(u)), sorted(adjacency[u]))
+            self.assertEqual(compact.degree(u), tables.degree(u))
+            for v in range(50):
+                self.assertEqual(compact.has_edge(u, v), tables.has_edge(u, v))
+        self.assertEqual(compact.mst_with_weight()[1], tables.mst_with_weight()[1])
+
+    def test_compact_adjacency_promotes_what_it_cant_store(self):
+        graph = Graph()
+        for u in (0, 1, 2, (0, 1), 1 << 63):
+            graph.create_vertex(u)
+        graph.create_edge(0, 1, 1)
+        graph.create_edge(0, 2, 2.5)
+        graph.create_edge(1, (0, 1), 3)
+        graph.create_edge(2, 1 << 63, 4)
+        self.assertIs(type(graph.g[0][1]), int)
+        self.assertEqual(graph.g[0][2], 2.5)
+        self.assertEqual(graph.shortest_path((0, 1), 1 << 63), [(0, 1), 1, 0, 2, 1 << 63])
+
+    def test_mixed_vertex_ids_with_tied_weights(self):
+        graph = Graph()
+        graph.maintain_mst()
+        graph.load_edges([(0, (0, 1), 1), ((0, 1), 2, 1), (0, 1, 1), (1, 2, 1), (1, (1, 1), 1)])
+        self.assertEqual(len(graph.shortest_path(0, 2)), 3)
+        self.assertEqual(len(graph.shortest_path(0, 2, 'bidirectional')), 3)
+        self.assertEqual(len(graph.shortest_path(0, 2, 'astar', lambda x, v: 0)), 3)
+        for algorithm in ('auto', 'prim', 'kruskal'):
+            self.assertEqual(graph.mst_with_weight(algorithm)[1], 4)
+        graph.delete_edges([(0, (0, 1)), ((1, 1), 1)])
+        self.assertEqual(graph.mst_with_weight()[1], 3)
+
+    def test_load_edges_matches_create_edge(self):
+        rng = random.Random(21)
+        expected, adjacency = self._random_graph(rng, 30, 80)
+        edges = [(u, v, w) for u in adjacency for v, w in adjacency[u].items() if u <= v]
+        with tempfile.TemporaryDirectory() as directory:
+            csv_path = os.path.join(directory, 'edges.csv')
+            with open(csv_path, 'w') as f:
+                f.write('# u,v,w\n')
+                f.writelines('%d,%d,%d\n' % edge for edge in edges)
+            binary_path = os.path.join(directory, 'edges.bin')
+            with open(binary_path, 'wb') as f:
+                for edge in edges:
+                    f.write(Graph.EDGE_RECORD.pack(*edge))
+            for source, format in ((edges, 'csv'), (csv_path, 'csv'), (binary_path, 'binary')):
+                graph = Graph()
+                self.assertEqual(graph.load_edges(source, format, chunk_size=7), len(edges))
+                for u in adjacency:
+                    if adjacency[u]:
+                        self.assertEqual(dict(graph.g[u].items()), adjacency[u])
+                self.assertEqual(graph.mst_with_weight()[1], expected.mst_with_weight()[1])
+        with self.assertRaises(Exception):
+            Graph().load_edges([(0, 1, 1), (1, 0, 2)])
+
+
+    def test_path_cache_is_invalidated_by_every_mutation(self):
+        graph = Graph()
+        for u in range(6):
+            graph.create_vertex(u)
+        for u, v, w in ((0, 1, 1), (1, 2, 1), (2, 3, 1), (0, 5, 10), (5, 3, 10)):
+            graph.create_edge(u, v, w)
+        cache = graph.enable_path_cache()
+
+        def query(expected: List[int], hit: bool):
+            hits, misses = cache.hits, cache.misses
+            self.assertEqual(graph.shortest_path(0, 3), expected)
+            self.assertEqual((cache.hits - hits, cache.misses - misses), (1, 0) if hit else (0, 1))
+
+        query([0, 1, 2, 3], False)
+        query([0, 1, 2, 3], True)
+        mutations = (
+            (lambda: graph.create_edge(0, 3, 1), [0, 3]),
+            (lambda: graph.delete_edge(0, 3), [0, 1, 2, 3]),
+            (lambda: graph.create_vertex(6), [0, 1, 2, 3]),
+            (lambda: graph.delete_vertex(2), [0, 5, 3]),
+            (lambda: graph.load_edges([(1, 3, 1)]), [0, 1, 3]),
+        )
+        for mutate, expected in mutations:
+            mutate()
+            query(expected, False)
+            query(expected, True)
+
+    def test_component_index_prechecks_reachability(self):
+        graph, adjacency = self._random_graph(random.Random(25), 40, 30)
+        index = graph.maintain_components()
+        u, v = next((u, v) for u in adjacency for v in adjacency if v not in self._reference_distances(adjacency, u))
+        with self.assertRaises(Exception):
+            graph.shortest_path(u, v)
+        x, y = next((x, y) for x in adjacency for y in adjacency[x] if x != y)
+        graph.delete_edge(x, y)
+        self.assertTrue(index.stale)
+        graph.shortest_path(x, x)
+        self.assertTrue(index.stale)  # queries don't rebuild a stale index
+        reachable = self._reference_distances({a: {b: w for b, w in n.items() if {a, b} != {x, y}}
+                                               for a, n in adjacency.items()}, x)
+        self.assertEqual(graph.connected(x, y), y in reachable)
+        self.assertFalse(index.stale)
+        self.assertEqual(index.component_size(x), len(reachable))
+
+    def test_batched_deletion_matches_reference(self):
+        def tracked(get_hash, capacity=4):
+            return HashTable(get_hash, capacity, track_stats=True)
+        graph, adjacency = self._random_graph(random.Random(23), 60, 150, table_cls=tracked, compact_threshold=0)
+        for u in range(60):  # vertex 0 is a hub and every vertex has a self-loop
+            for v in (0, u):
+                if v not in adjacency[u]:
+                    graph.create_edge(u, v, 1)
+                    adjacency[u][v] = adjacency[v][u] = 1
+
+        def drop(u):
+            for v in adjacency.pop(u):
+                if v != u:
+                    del adjacency[v][u]
+
+        graph.delete_vertex(59)
+        drop(59)
+        u, v = next((u, v) for u in adjacency for v in adjacency if v not in adjacency[u])
+        with self.assertRaises(Exception):
+            graph.delete_edges([(0, 1), (u, v)])
+        with self.assertRaises(Exception):
+            graph.delete_vertices([1, 2, 1000])
+        self.assertTrue(graph.has_edge(0, 1))
+        self.assertIn(2, graph.g)
+
+        resizes = graph.g.stats()['resizes'], graph.g[0].stats()['resizes']
+        doomed = list(range(1, 58))  # neighbours of each other and of the hub, deleted in one batch
+        graph.delete_vertices(doomed + doomed[:3])
+        for u in doomed:
+            drop(u)
+        # Each table shrinks once at the end instead of halving repeatedly as it empties
+        self.assertEqual(graph.g.stats()['resizes'], resizes[0] + 1)
+        self.assertEqual(graph.g[0].stats()['resizes'], resizes[1] + 1)
+
+        graph.delete_edges([(58, 58), (0, 58), (58, 0)])
+        for u, v in ((58, 58), (0, 58)):
+            adjacency[u].pop(v)
+            adjacency[v].pop(u, None)
+        self.assertEqual(sorted(graph.g), sorted(adjacency))
+        for u in adjacency:
+            self.assertEqual(dict(graph.g[u].items()), adjacency[u])
+
+    def test_loaded_graph_saves_and_runs_worker_pools(self):
+        graph, adjacency = self._random_graph(random.Random(24), 40, 90)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'graph.bin')
+            graph.save(path)
+            for mmap in (True, False):
+                loaded = Graph.load(path, mmap)
+                copy_path = os.path.join(directory, 'copy.bin')
+                loaded.save(copy_path)
+                with open(path, 'rb') as original, open(copy_path, 'rb') as copy:
+                    self.assertEqual(original.read(), copy.read())
+                self.assertEqual(loaded.boruvka_mst(workers=2)[1], self._reference_mst_weight(adjacency))
+                for u, dist in loaded.batch_shortest_paths([0, 7, 19], workers=2):
+                    self.assertEqual(dist, self._reference_distances(adjacency, u))
+
+
+    def test_truncated_graph_file_is_rejected(self):
+        graph, _ = self._random_graph(random.Random(24), 10, 20)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'graph.bin')
+            graph.save(path)
+            with open(path, 'rb') as f:
+                data = f.read()
+            for cut in (16, len(data) - 8):
+                with open(path, 'wb') as f:
+                    f.write(data[:-cut])
+                for mmap in (True, False):
+                    with self.assertRaises(Exception):
+                        Graph.load(path, mmap)
 
 
 if __name__ == '__main__':